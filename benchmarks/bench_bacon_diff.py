@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark diff_trees against dictdiffer.diff on normalised BACON state trees
+
+    python benchmarks/bench_bacon_diff.py [--devices N] [--changed N] [--repeat N]
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dictdiffer import diff                         # noqa: E402
+from pylib.bacon import diff_trees                  # noqa: E402
+
+
+def make_tree(devices):
+    return {
+        'SECTION': {
+            'DEVICES': dict(
+                ('D{}'.format(index), {
+                    'DEVICE': 'D{}'.format(index),
+                    'DEVICE_TYPE': 'TYPE{}'.format(index % 7),
+                    'VALUE': index,
+                    'LEVEL': index * 0.5,
+                    'DEVICE_STATE': {'A': 'x' * 20, 'B': {'X': 1, 'Y': 2}, 'C': [1, 2, 3]},
+                }) for index in range(devices)),
+        },
+        'OTHER': [1, 2, 3],
+    }
+
+
+def change_tree(tree, changed):
+    tree = copy.deepcopy(tree)
+    devices = tree['SECTION']['DEVICES']
+    names = sorted(devices)
+    step = max(1, len(names) // max(1, changed))
+    for name in names[::step][:changed]:
+        devices[name]['VALUE'] += 1
+        devices[name]['DEVICE_STATE']['B']['Y'] = 3
+    return tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=5000, help='devices per tree')
+    parser.add_argument('--changed', type=int, default=10, help='devices changed')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repeats')
+    args = parser.parse_args()
+
+    first = make_tree(args.devices)
+    for label, second in (('identical', copy.deepcopy(first)),
+                          ('{} changed'.format(args.changed), change_tree(first, args.changed)),
+                          ('all changed', change_tree(first, args.devices))):
+        expected = list(diff(first, second))
+        assert diff_trees(first, second) == expected
+        times = [min(timeit.repeat(func, number=1, repeat=args.repeat))
+                 for func in (lambda: list(diff(first, second)), lambda: diff_trees(first, second))]
+        print('{:>14}: {:5d} diffs  dictdiffer {:8.4f}s  diff_trees {:8.4f}s  x{:.1f}'.format(
+            label, len(expected), times[0], times[1], times[0] / max(times[1], 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
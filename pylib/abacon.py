@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio API for loading BACON files and computing their Delta (python 3 only)
+Reading, parsing and diffing are run in an executor, so a large file does not block the
+event loop, while a per loop semaphore limits how many run at once
+Work is done on a detached copy of the Bacon or Delta and only applied once it completes,
+so a cancelled call leaves its object as it was (work already running in the executor
+finishes in the background and is discarded, work still queued is dropped)
+"""
+import asyncio
+import copy
+import os
+import weakref
+from concurrent import futures
+
+from pylib.bacon import Bacon, LazySections, copy_tree
+
+__all__ = (
+    'AsyncRunner',
+    'RUNNER',
+    'aparse',
+    'adiff',
+    'aload',
+)
+
+
+# default concurrency limit
+DEFAULT_LIMIT = os.cpu_count() or 1
+
+
+class AsyncRunner(object):
+    """
+    Runs blocking BACON work in an executor for coroutines, at most limit at a time per event loop
+    """
+
+    def __init__(self, executor=None, limit=DEFAULT_LIMIT):
+        self.executor = None
+        self.limit = None
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.configure(executor, limit)
+
+    def configure(self, executor=None, limit=DEFAULT_LIMIT):
+        """
+        :param concurrent.futures.Executor executor: executor to run in, None for the loop's default
+                                                     (threads), a ProcessPoolExecutor also offloads the GIL
+        :param int limit: maximum concurrent calls per event loop, None or 0 for no limit
+        """
+        self.executor = executor
+        self.limit = limit or None
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def in_process(self):
+        """whether work is run in this process, sharing objects rather than pickling them"""
+        return not isinstance(self.executor, futures.ProcessPoolExecutor)
+
+    def _semaphore(self, loop):
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def run(self, func, *args):
+        """
+        :param callable func: blocking function, picklable for a process executor
+        :param args: its arguments
+        :return: func(*args), once a slot is free and it has run in the executor
+        """
+        loop = asyncio.get_event_loop()
+        if self.limit is None:
+            return await loop.run_in_executor(self.executor, func, *args)
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self.executor, func, *args)
+
+
+# used unless a runner is given
+RUNNER = AsyncRunner()
+
+
+def _detach(bacon):
+    """
+    :return: copy of a Bacon with its own copy of any parsed tree, which parse(normalise=True)
+             changes in place, and without its parser (which may hold a memory map)
+    """
+    detached = copy.copy(bacon)
+    detached._parser = None
+    parsed = bacon.parsed
+    if isinstance(parsed, LazySections):
+        parsed = copy.copy(parsed)
+        parsed.offsets, parsed.pairs = copy.copy(parsed.offsets), list(parsed.pairs)
+        parsed.sections = copy_tree(parsed.sections)
+        detached.parsed = parsed
+    elif parsed is not None:
+        detached.parsed = copy_tree(parsed)
+    return detached
+
+
+def _parse_detached(bacon, normalise, only, keep_parser):
+    """aparse worker, :return: bacon once parsed"""
+    bacon.parse(normalise=normalise, only=only)
+    if not keep_parser:
+        bacon._parser = None
+    return bacon
+
+
+def _diff_detached(delta, clean, kwargs, keep_state):
+    """adiff worker, :return: (differences, delta if its parsed state is wanted back)"""
+    return delta.diff(clean=clean, **kwargs), delta if keep_state else None
+
+
+async def aparse(bacon, normalise=False, only=None, runner=None):
+    """
+    Bacon.parse() in an executor
+    :param Bacon bacon: to parse
+    :param bool normalise: normalise devices
+    :param list only: as Bacon.parse
+    :param AsyncRunner runner: default RUNNER
+    :return: parsed sections
+    """
+    if bacon.parsed and (not normalise or bacon.normalised):
+        return bacon.parsed
+    runner = runner or RUNNER
+    if not runner.in_process and (bacon.lazy or isinstance(bacon.parsed, LazySections)):
+        raise ValueError('Lazily parsed sections cannot be passed between processes')
+    parsed = await runner.run(_parse_detached, _detach(bacon), normalise, only, runner.in_process)
+    bacon.__dict__.update(parsed.__dict__)
+    return bacon.parsed
+
+
+async def adiff(delta, clean=True, runner=None, **kwargs):
+    """
+    Delta.diff() in an executor
+    :param Delta delta: files to difference
+    :param bool clean: whether to clean
+    :param AsyncRunner runner: default RUNNER
+    :param kwargs: as Delta.diff
+    :return: list of differences
+    """
+    runner = runner or RUNNER
+    detached = copy.copy(delta)
+    detached.bacon = [_detach(bacon) for bacon in delta.bacon]
+    detached.parsed = list(delta.parsed)
+    result, state = await runner.run(_diff_detached, detached, clean, kwargs, runner.in_process)
+    if state is not None:
+        for bacon, parsed in zip(delta.bacon, state.bacon):
+            bacon.__dict__.update(parsed.__dict__)
+        delta.__dict__.update(dict(state.__dict__, bacon=delta.bacon))
+    else:
+        delta._diff, delta._diff_kwargs = result, dict(kwargs)
+    return list(result)
+
+
+async def aload(path, normalise=True, only=None, runner=None, **kwargs):
+    """
+    :param str path: BACON file
+    :param bool normalise: normalise devices
+    :param list only: as Bacon.parse
+    :param AsyncRunner runner: default RUNNER
+    :param kwargs: other Bacon arguments
+    :return: Bacon, parsed
+    """
+    bacon = Bacon(source=path, **kwargs)
+    await aparse(bacon, normalise, only, runner)
+    return bacon
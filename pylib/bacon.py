@@ -7,12 +7,33 @@ It implements enough to handle Mediator state files only.
 """
 from __future__ import unicode_literals
 
+import bisect
+from array import array
+import codecs
+import hashlib
 import logging
 import sys
 import os
+import re
 import json
+import marshal
+import mmap
+import platform
+import struct
+import threading
+from collections import OrderedDict, deque, namedtuple
+try:
+    from concurrent import futures
+except ImportError:     # python 2 without the futures backport
+    futures = None
+try:
+    from collections.abc import MutableMapping, MutableSequence, MutableSet, Sequence
+except ImportError:     # python 2
+    from collections import MutableMapping, MutableSequence, MutableSet, Sequence
+from copy import deepcopy
 
 import jsonpath_rw_ext as jsonpath
+from six import integer_types, string_types
 # noinspection PyProtectedMember
 from dictdiffer import diff, patch, are_different, EPSILON
 
@@ -22,10 +43,33 @@ byte_types = (bytes, bytearray) if sys.version_info[0] >= 3 else (str,)
 
 
 __all__ = (
+    'ParseError',
     'Parser',
+    'ScannerParser',
+    'IterativeParser',
+    'MappedText',
+    'LazySections',
+    'NumberArray',
+    'compact_tree',
+    'ParseCache',
+    'PARSE_CACHE',
+    'load_sidecar',
+    'save_sidecar',
+    'Event',
+    'build_events',
+    'PathIndex',
     'Bacon',
+    'dump',
+    'dumps',
+    'ParseResult',
+    'parse_many',
     'MatchType',
     'Delta',
+    'DeltaSeries',
+    'SeriesDiff',
+    'DeltaResult',
+    'delta_many',
+    'diff_trees',
 )
 
 
@@ -70,6 +114,16 @@ ESCAPE_Python_2_Text = {
 # predefined encoding
 DEFAULT_ENCODING = "utf-8"
 UNICODE_ENCODING = 'unicode'
+# tokenizer engines
+ENGINE_CHAR = 'char'
+ENGINE_SCANNER = 'scanner'
+ENGINE_ITERATIVE = 'iterative'
+# default read size when streaming
+CHUNK_SIZE = 64 * 1024
+# JSONPath or dot-notation path components: .key, .'key', ["key"], [0], [*]
+PATH_COMPONENT = re.compile(r'''\.?(?:'([^']*)'|"([^"]*)"|([^.\[\]'"$]+))|\[\s*(?:'([^']*)'|"([^"]*)"|(\d+)|(\*))\s*\]''')
+# placeholder for values passed over by a path filtered parse
+SKIPPED = object()
 
 
 def combine(*args):
@@ -77,15 +131,489 @@ def combine(*args):
     return ''.join([arg for arg in args if arg is not None])
 
 
-class Parser(object):
+def split_path(path):
+    """
+    Split a JSONPath ($.a.b[0]) or dot-notation (a.b) path into its components
+    :param str path: path to split
+    :return: list of str keys ('*' for any key), int list indices and slice(None) for [*]
+    """
+    components = []
+    index = 1 if path.startswith('$') else 0
+    while index < len(path):
+        match = PATH_COMPONENT.match(path, index)
+        if match is None or match.end() == index:
+            raise ValueError('Unsupported path {!r} at offset {}'.format(path, index))
+        quoted, dquoted, key, iquoted, idquoted, number, star = match.groups()
+        if number is not None:
+            components.append(int(number))
+        elif star is not None:
+            components.append(slice(None))
+        else:
+            components.append(next(c for c in (quoted, dquoted, key, iquoted, idquoted) if c is not None))
+        index = match.end()
+    return components
+
+
+def path_filter(paths, pairs=None):
+    """
+    Build the filter for a partial parse selecting the given path prefixes
+    List indices are ignored, as lists pass the filter of their container through to each item
+    Paths may be written against the normalised tree, in which case the component following
+    a normalised key is the item's subkey value and selects any item (including its subkey)
+    :param paths: JSONPath or dot-notation path prefixes
+    :param dict pairs: normalisation spec (key: subkey) the paths may be written against
+    :return: nested dict of key to filter below it, None where a whole subtree is selected
+    """
+    only = {}
+    for path in paths:
+        components, keys = split_path(path), []
+        while components:
+            key = components.pop(0)
+            if isinstance(key, (int, slice)):
+                continue
+            subkey = pairs.get(key) if pairs else None
+            if subkey and components:   # item of a normalised list
+                components.pop(0)
+            keys.append((key, subkey))
+        if not keys:
+            return None
+        node = only
+        for key, subkey in keys[:-1]:
+            node = node.setdefault(key, {})
+            if node is None:    # a shorter prefix already selects this subtree
+                break
+            if subkey:
+                node[subkey] = None
+        else:
+            node[keys[-1][0]] = None
+    return only
+
+
+def merge_filters(first, second):
+    if first is None or second is None:
+        return None
+    merged = dict(first)
+    for key, value in second.items():
+        merged[key] = merge_filters(merged[key], value) if key in merged else value
+    return merged
+
+
+def select_path(only, key):
+    """
+    :return: the filter below key, SKIPPED if key is not selected
+    """
+    selected = only.get(key, SKIPPED)
+    wildcard = only.get('*', SKIPPED)
+    if wildcard is SKIPPED:
+        return selected
+    if selected is SKIPPED:
+        return wildcard
+    return merge_filters(selected, wildcard)
+
+
+def prune_skipped(element, only):
+    """remove the SKIPPED placeholders left by a filtered parse, following the filter used"""
+    if only is None:
+        return
+    if isinstance(element, dict):
+        for key in [k for k, v in element.items() if v is SKIPPED]:
+            del element[key]
+        for key, value in element.items():
+            below = select_path(only, key)
+            if below is not SKIPPED:
+                prune_skipped(value, below)
+    elif isinstance(element, list):
+        for value in element:
+            prune_skipped(value, only)
+
+
+def fold_list(out_dict, out_list):
+    """collapse list into dict where possible"""
+    if out_list:
+        if all((isinstance(v, dict) for v in out_list)):
+            all_keys = set()
+            for v in out_list:  # ensure that all keys are unique across dicts
+                keys = set(v.keys())
+                if all_keys.intersection(keys):
+                    break
+                all_keys.update(keys)
+            else:
+                # no overlap therefore can safely collapse
+                for v in out_list:
+                    out_dict.update(v)
+        elif all((isinstance(v, list) for v in out_list)):
+            result = []
+            for v in out_list:
+                result.extend(v)
+            out_list = result
+    return out_dict, out_list
+
+
+def fold_object(out_dict, out_list):
+    """the value of a closed object from its dict and list context contents"""
+    out_dict, out_list = fold_list(out_dict, out_list)
+    return out_dict if out_dict or not out_list else out_list
+
+
+# noinspection PyClassHasNoInit
+class Event:
+    """events generated by Parser.events()"""
+    START_SECTION = 'start_section'
+    END_SECTION = 'end_section'
+    START_OBJECT = 'start_object'
+    END_OBJECT = 'end_object'
+    KEY = 'key'
+    SCALAR = 'scalar'
+
+
+# separators of json.dumps without indent
+DEFAULT_SEPARATORS = (', ', ': ')
+# kinds of rendered values held by encode_events
+RENDERED_DICT, RENDERED_LIST, RENDERED_SCALAR = range(3)
+
+
+def render_value(value, encode, separators):
+    """:return: JSON text of an encode_events (kind, members) value"""
+    kind, members = value
+    if kind == RENDERED_DICT:
+        return '{' + separators[0].join(encode(key) + separators[1] + text for key, text in members.items()) + '}'
+    if kind == RENDERED_LIST:
+        return '[' + separators[0].join(members) + ']'
+    return members
+
+
+def fold_rendered(entries, items, encode, separators):
+    """fold_object() of rendered values, :return: (kind, members)"""
+    if items:
+        if all(kind == RENDERED_DICT for kind, _ in items):
+            all_keys = set()
+            for _, members in items:
+                if all_keys.intersection(members):
+                    break
+                all_keys.update(members)
+            else:
+                for _, members in items:
+                    entries.update(members)
+        elif all(kind == RENDERED_LIST for kind, _ in items):
+            elements = []
+            for _, members in items:
+                elements.extend(members)
+            return (RENDERED_DICT, entries) if entries or not elements else (RENDERED_LIST, elements)
+    if entries or not items:
+        return RENDERED_DICT, entries
+    return RENDERED_LIST, [render_value(item, encode, separators) for item in items]
+
+
+def encode_events(events, encode=None, separators=DEFAULT_SEPARATORS):
+    """
+    Consumer of Parser.events() rendering each section as JSON, as json.dumps() of build_events()
+    would, without building the tree
+    Folding needs the whole of an object, so each open object holds its members as JSON text:
+    its dict context by key, its list context as (kind, members) so fold_list can still merge
+    dicts or join lists, nested objects below those are only held as text
+    :param events: iterable of (event, value)
+    :param callable encode: JSON encoder of scalars and keys
+    :param tuple separators: item and key separators
+    :return: generator of (section name, JSON text of its value)
+    """
+    encode = encode or json.JSONEncoder(separators=separators).encode
+    stack = []      # [dict context OrderedDict, list context list, key] of each open object
+    value = None
+    for event, data in events:
+        if event == Event.START_OBJECT:
+            stack.append([OrderedDict(), [], None])
+            continue
+        elif event == Event.KEY:
+            stack[-1][2] = data
+            continue
+        elif event == Event.END_SECTION:
+            yield data, render_value(value, encode, separators)
+            continue
+        elif event == Event.START_SECTION:
+            continue
+        elif event == Event.END_OBJECT:
+            entries, items, _ = stack.pop()
+            value = fold_rendered(entries, items, encode, separators)
+        else:
+            value = RENDERED_SCALAR, encode(data)
+        if not stack:
+            continue
+        elif stack[-1][2] is None:
+            stack[-1][1].append(value)
+        else:
+            entries = stack[-1][0]
+            entries[stack[-1][2]] = render_value(value, encode, separators)
+            stack[-1][2] = None
+
+
+def build_events(events):
+    """
+    Reference consumer of Parser.events(), building the same result as Parser.parse()
+    :param events: iterable of (event, value)
+    :return: dict of section name to value
+    """
+    top_level_dict = {}
+    stack = []      # [out_dict, out_list, key] of each open object
+    section = None
+    for event, data in events:
+        if event == Event.START_OBJECT:
+            stack.append([{}, [], None])
+            continue
+        elif event == Event.KEY:
+            stack[-1][2] = data
+            continue
+        elif event == Event.END_SECTION:
+            top_level_dict[data] = section
+            continue
+        elif event == Event.START_SECTION:
+            continue
+        elif event == Event.END_OBJECT:
+            out_dict, out_list, _ = stack.pop()
+            value = fold_object(out_dict, out_list)
+        else:
+            value = data
+        if not stack:
+            section = value
+        elif stack[-1][2] is None:
+            stack[-1][1].append(value)
+        else:
+            stack[-1][0][stack[-1][2]] = value
+            stack[-1][2] = None
+    return top_level_dict
+
+
+class ScanPatterns(object):
+    """
+    Compiled token patterns used by the scanner engine, for str or memory mapped buffers
+    """
+
+    def __init__(self, binary=False):
+        self.binary = binary
+        # groups: content, then one of closing quote, backslash, control character
+        self.string = dict(
+            (quote, self.compile(r'([^{0}\\\x00-\x1f]*)(?:({0})|(\\)|([\x00-\x1f]))'.format(quote)))
+            for quote in '"\'')
+        self.integer = self.compile(r'[+-]?[0-9]*')
+        self.whitespace = self.compile(r'[ \t\n\r]*')
+        self._to_character = {}
+        # structural scanning, passing over plain text, complete strings and comments
+        # groups: section marker, object start, object end, comment, double quote, single quote
+        self.structure = self.compile(
+            r'''(?:[^*{}<>"'#]+|"[^"\\]*(?:\\[\s\S][^"\\]*)*"|'[^'\\]*(?:\\[\s\S][^'\\]*)*'|#[^\n]*\n)*'''
+            r'''(?:(\*)|([{<])|([}>])|(#)|(")|('))?''')
+        # groups: closing quote, backslash
+        self.quoted = dict((quote, self.compile(r'({})|(\\)'.format(quote))) for quote in '"\'')
+        self.newline = self.compile(r'\n')
+        self.name_end = self.compile(r'[\t\n\r ]')
+
+    def compile(self, pattern):
+        return re.compile(pattern.encode('latin-1') if self.binary else pattern)
+
+    def to_character(self, chars):
+        try:
+            return self._to_character[chars]
+        except KeyError:
+            pattern = self._to_character[chars] = self.compile('[{}]'.format(re.escape(chars)))
+            return pattern
+
+
+STR_PATTERNS = ScanPatterns()
+BYTE_PATTERNS = ScanPatterns(binary=True)
+
+
+def _scan_quoted(string, index, mode, patterns):
+    """
+    Pass over the rest of a comment or quoted string, for scan_structure
+    :return: (index, mode) - the position following it and None, or the position reached and
+             the mode to resume in
+    """
+    if mode == '#':
+        match = patterns.newline.search(string, index)
+        return (len(string), mode) if match is None else (match.end(), None)
+    if mode[0] == '\\':     # escaped character split from its backslash
+        return index + 1, mode[1]
+    match = patterns.quoted[mode].search(string, index)
+    if match is None:
+        return len(string), mode
+    index = match.end()
+    if match.lastindex != 2:
+        return index, None
+    if index >= len(string):    # backslash at the end
+        return index, '\\' + mode
+    return index + 1, mode
+
+
+def scan_structure(string, index=0, state=None, patterns=STR_PATTERNS, close=False):
+    """
+    Scan BACON text for the next top level section marker without decoding any values,
+    tracking object nesting, quoted strings and comments along the way
+    :param str string: text (or bytes, with BYTE_PATTERNS) to scan
+    :param int index: position to start from
+    :param tuple state: state returned by a previous scan of preceding text
+    :param ScanPatterns patterns: patterns matching the type of string
+    :param bool close: stop instead after the object end that returns nesting to depth 0
+    :return: (index, state) - position of a '*' at nesting depth 0 (or following the closing
+             object end) and None, or the end of string and the (depth, mode) state to resume
+             from in following text
+    """
+    depth, mode = state or (0, None)
+    length = len(string)
+    while index < length:
+        if mode is not None:
+            index, mode = _scan_quoted(string, index, mode, patterns)
+            continue
+        match = patterns.structure.match(string, index)
+        index, token = match.end(), match.lastindex
+        if token is None:
+            break
+        elif token == 1:
+            if not depth:
+                return index - 1, None
+        elif token == 2:
+            depth += 1
+        elif token == 3:
+            depth -= 1
+            if close and not depth:
+                return index, None
+        else:   # comment or quote
+            mode = '#"\''[token - 4]
+    return index, (depth, mode)
+
+
+class MappedText(object):
+    """
+    Read only str-like view of a memory mapped file, indexed by byte offset
+    Single characters are returned undecoded for structural tests, slices are decoded
+    """
+
+    def __init__(self, buffer, encoding):
+        self.buffer = buffer
+        self.encoding = encoding
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.buffer[item].decode(self.encoding)
+        char = self.buffer[item]
+        return char if isinstance(char, str) else chr(char)
+
+    def excerpt(self, start, end):
+        """:return: slice decoded for an error message, which may cut a multi-byte character"""
+        return self.buffer[start:end].decode(self.encoding, 'replace')
+
+
+class LineIndex(object):
+    """
+    Offsets of the newlines in a text or buffer, found on first use, so the line
+    and column of any offset are found by bisection rather than by counting
+    """
+
+    def __init__(self, text, newline='\n'):
+        self.text = text
+        self.newline = newline
+        self._newlines = None
 
-    def __init__(self, string=None, source=None, encoding=None):
+    @property
+    def newlines(self):
+        if self._newlines is None:
+            newlines, find, newline = [], self.text.find, self.newline
+            index = find(newline)
+            while index >= 0:
+                newlines.append(index)
+                index = find(newline, index + 1)
+            self._newlines = newlines
+        return self._newlines
+
+    def line_col(self, offset):
+        """:return: (line, column) of offset, as 1 + newlines before it and the distance from the last one"""
+        newlines = self.newlines
+        count = bisect.bisect_left(newlines, offset)
+        if count == 0:
+            return 1, offset
+        return 1 + count, offset - newlines[count - 1]
+
+
+def format_error(msg, basename, string, lines, start, end):
+    """:return: error message locating start in the input"""
+    row, col = lines.line_col(start)
+    excerpt = string.excerpt(start, end) if isinstance(string, MappedText) else string[start:end]
+    return '{}: {}({}:{}) offset {}: "{}"'.format(msg, basename, row, col, start, excerpt)
+
+
+class ParseError(ValueError):
+    """
+    Error in the input, str() gives the message with the file, line and column of the error
+    Parser(defer_errors=True) only formats that when the error is shown, so errors that are
+    caught and passed over cost no more than raising them
+    """
+
+    def __init__(self, msg, parser=None, start=None, end=None):
+        """
+        :param str msg: what is wrong, or the whole message when no parser is given
+        :param Parser parser: parser whose input, at the time of the error, is located
+        :param int start: offset of the error
+        :param int end: offset after the text quoted
+        """
+        self.msg = msg
+        self._message = msg
+        self._location = None
+        if parser is not None:
+            location = msg, parser.basename, parser.string, parser.lines, start, end
+            if parser.defer_errors:
+                self._message, self._location = None, location
+            else:
+                self._message = format_error(*location)
+        super(ParseError, self).__init__(self._message or msg)
+
+    def __str__(self):
+        if self._message is None:
+            self._message, self._location = format_error(*self._location), None
+        return self._message
+
+    def __reduce__(self):
+        return ParseError, (str(self),)
+
+
+class Parser(object):
+    """
+    Character at a time BACON parser
+    Parser(engine=ENGINE_SCANNER) returns the equivalent regex driven tokenizer,
+    which is also the default for memory mapped input, and Parser(engine=ENGINE_ITERATIVE)
+    the same tokenizer decoding objects without recursion
+    """
+    engine = ENGINE_CHAR
+    buffer = None
+    patterns = STR_PATTERNS
+    normaliser = None
+    lines = None
+
+    def __new__(cls, *args, **kwargs):
+        engine = kwargs.get('engine')
+        if engine is None and kwargs.get('mapped'):
+            engine = ENGINE_SCANNER
+        if cls is Parser and engine is not None:
+            try:
+                cls = ENGINES[engine]
+            except KeyError:
+                raise ValueError('Unknown parser engine {!r}'.format(engine))
+        return super(Parser, cls).__new__(cls)
+
+    # noinspection PyUnusedLocal
+    def __init__(self, string=None, source=None, encoding=None, engine=None, mapped=False, defer_errors=False):
+        if mapped and not isinstance(self, ScannerParser):
+            raise ValueError('Memory mapped input requires the {} engine'.format(ENGINE_SCANNER))
+        self.mapped = mapped
+        # format ParseError messages only when shown
+        self.defer_errors = defer_errors
         self.encoding = encoding or DEFAULT_ENCODING
         self._filename = None
         self.string = None
         self.length = 0
         self.index = 0
         self.recursion_level = 0
+        self.only = None
         self.setup(string, source)
 
     @property
@@ -132,11 +660,13 @@ class Parser(object):
 
         if string:
             self.set_filename(stream='text')
-        else:
+        elif source is not None:
             string = read(source)
 
         self.string = "" if not string else encode(string)
-        self.length = len(string)
+        self.buffer, self.patterns = self.string, STR_PATTERNS
+        self.lines = LineIndex(self.string)
+        self.length = len(self.string)
         self.index = 0
 
     def output_err(self, msg, start=None, end=None):
@@ -145,18 +675,13 @@ class Parser(object):
             start = self.index
         if end is None:
             end = start + 1
+        return format_error(msg, self.basename, self.string, self.lines, start, end)
 
-        def get_line_col(_string, _start):
-            line_num = 1 + _string.count('\n', 0, _start)
-            if line_num == 1:
-                return line_num, _start
-            else:
-                col_num = _start - _string.rindex('\n', 0, _start)
-                return line_num, col_num
-
-        row, col = get_line_col(self.string, start)
-        out = '{}: {}({}:{}) offset {}: "{}"'
-        return out.format(msg, self.basename, row, col, start, self.string[start:end])
+    def error(self, msg, start=None, end=None):
+        """:return: ParseError at start (default the current position), see output_err"""
+        if start is None:
+            start = self.index
+        return ParseError(msg, self, start, start + 1 if end is None else end)
 
     def inc(self, by=1):
         self.index = self.length if by >= self.length - self.index else self.index + by
@@ -175,7 +700,7 @@ class Parser(object):
         try:
             return self.string[self.index]
         except IndexError:
-            raise ValueError(self.output_err('unexpected end of string'))
+            raise self.error('unexpected end of string')
 
     def nextch(self):
         ch = self.atch
@@ -210,7 +735,7 @@ class Parser(object):
         # catch index error
         start_index = self.index
         if self.atch not in '"\'':
-            raise ValueError(self.output_err("String must start with a quote"))
+            raise self.error("String must start with a quote")
         quote = self.nextch()
         try:
             char = ""
@@ -220,29 +745,34 @@ class Parser(object):
                     return char
                 elif ch == '\\':
                     # find backslash
-                    ch = self.nextch()
-                    pos = self.index
-                    if ch == 'u':
-                        # find \uxxxx
-                        nums = self.nextseq(0, 4)
-                        # check the four char is num
-                        for num in nums:
-                            if num not in HEX_NUMBER:
-                                raise ValueError(self.output_err("Invalid \\uXXXX", pos, pos + 4))
-                        return chr(int(nums, 16))
-                    else:
-                        # control char
-                        try:
-                            char += BACKSLASH[ch]
-                        except KeyError:
-                            raise ValueError(self.output_err('Invalid \\escape: ' + repr(ch), pos))
+                    char += self.match_escape()
                 elif ch <= '\x1f':
-                    raise ValueError(self.output_err('Invalid control character'))
+                    raise self.error('Invalid control character')
                 else:   # find normal characters
                     char += ch
         except IndexError:
             pass
-        raise ValueError(self.output_err("Unterminated string", start_index))
+        raise self.error("Unterminated string", start_index)
+
+    def match_escape(self):
+        """
+        match the escape sequence following a backslash, return the character it represents
+        """
+        ch = self.nextch()
+        pos = self.index
+        if ch == 'u':
+            # find \uxxxx
+            nums = self.nextseq(0, 4)
+            # check the four char is num
+            for num in nums:
+                if num not in HEX_NUMBER:
+                    raise self.error("Invalid \\uXXXX", pos, pos + 4)
+            return chr(int(nums, 16))
+        # control char
+        try:
+            return BACKSLASH[ch]
+        except KeyError:
+            raise self.error('Invalid \\escape: ' + repr(ch), pos)
 
     def match_integer(self):
         """
@@ -363,15 +893,16 @@ class Parser(object):
             if frac or exp:
                 res = float(combine(integer, frac, exp))
                 if res == float('inf') or res == float('-inf') or res == float('nan'):
-                    raise ValueError(self.output_err('Number out of range', start_index))
+                    raise self.error('Number out of range', start_index)
             # else integer
             else:
                 res = int(integer)
             return res
         else:
-            raise ValueError(self.output_err('Can not parse string', start_index))
+            raise self.error('Can not parse string', start_index)
 
     OBJ_START = '{<'
+    OBJ_END = {'{': '}', '<': '>'}
 
     def parse_object(self):
         # check string or empty
@@ -379,32 +910,12 @@ class Parser(object):
         def complement(char):
             return '}' if char == '{' else '>' if char == '<' else '"' if char == '"' else "'" if char == "'" else None
 
-        def fold_list(_out_dict, _out_list):
-            # collapse list into dict where possible
-            if _out_list:
-                if all((isinstance(v, dict) for v in _out_list)):
-                    all_keys = set()
-                    for v in _out_list:  # ensure that all keys are unique across dicts
-                        keys = set(v.keys())
-                        if all_keys.intersection(keys):
-                            break
-                        all_keys.update(keys)
-                    else:
-                        # no overlap therefore can safely collapse
-                        for v in _out_list:
-                            _out_dict.update(v)
-                elif all((isinstance(v, list) for v in _out_list)):
-                    result = []
-                    for v in _out_list:
-                        result.extend(v)
-                    _out_list = result
-            return _out_dict, _out_list
-
         if self.atch not in self.OBJ_START:
-            raise ValueError(self.output_err('Expecting start of object {}'.format(self.OBJ_START)))
+            raise self.error('Expecting start of object {}'.format(self.OBJ_START))
         start_obj = self.nextch()
         end_obj = complement(start_obj)
         out_dict, out_list = {}, []
+        mark = self.normaliser.mark() if self.normaliser is not None else 0
         while True:
             _ = self.match_whitespace()
             if self.atch == end_obj:
@@ -423,19 +934,56 @@ class Parser(object):
                     self.inc()
                     _ = self.match_whitespace()
                     # get value & add to dict, coerce key to str
-                    out_dict[str(key)] = self.decode_one_value()
+                    if self.only is None:
+                        out_dict[str(key)] = self.decode_one_value()
+                    else:
+                        out_dict[str(key)] = self.decode_selected(str(key))
 
-        out_dict, out_list = fold_list(out_dict, out_list)
-        return out_dict if out_dict or not out_list else out_list
+        value = fold_object(out_dict, out_list)
+        if self.normaliser is not None:
+            self.normaliser.close(value, out_dict, out_list, mark)
+        return value
 
     def parse_section(self):
         _ = self.match_whitespace()
         if self.atch != '*':
-            raise ValueError(self.output_err('Expecting start of section "*"'))
+            raise self.error('Expecting start of section "*"')
         self.inc()
-        section_name = self.match_to_character('\t\n ')
+        section_name = self.match_to_character('\t\n\r ')
+        if self.only is not None:
+            value = self.decode_selected(section_name)
+            return None if value is SKIPPED else {section_name: value}
         return {section_name: self.decode_one_value()}
 
+    def decode_selected(self, key):
+        """
+        Decode the value under key if selected by the current path filter, otherwise skip it
+        :return: the value, or SKIPPED
+        """
+        only = self.only
+        self.only = select_path(only, key)
+        try:
+            if self.only is SKIPPED:
+                self.skip_value()
+                return SKIPPED
+            return self.decode_one_value()
+        finally:
+            self.only = only
+
+    def skip_value(self):
+        """
+        Pass over the next value, objects are skipped by bracket matching without being built
+        """
+        _ = self.match_whitespace()
+        if self.eos or self.atch not in self.OBJ_START:
+            _ = self.decode_one_value()
+            return
+        index, state = scan_structure(self.buffer, self.index + 1, (1, None), self.patterns, close=True)
+        if state is not None:
+            self.index = self.length
+            raise self.error('unexpected end of string')
+        self.index = index
+
     # a function map for decode different json type
     decode_func_map = {
         '"': parse_string,
@@ -463,7 +1011,7 @@ class Parser(object):
                         return self.parse_section()
                     # add other top level directives here...
                     else:
-                        raise ValueError(self.output_err('Expected start of section marker "*"'))
+                        raise self.error('Expected start of section marker "*"')
                 else:
                     try:
                         return self.decode_func_map[ch](self)
@@ -481,17 +1029,933 @@ class Parser(object):
         return top_level_dict
 
     # noinspection PyShadowingBuiltins
-    def parse(self, string=None, file=None):
+    def parse(self, string=None, file=None, only=None, pairs=None, normalise=None):
+        """
+        :param str string: string to parse
+        :param Any file: file or object with read to parse
+        :param list only: JSONPath or dot-notation prefixes of the only paths to decode
+        :param dict pairs: normalisation spec the only paths may be written against
+        :param dict normalise: normalisation spec (see normalise_tree) to apply while parsing,
+                               or after parsing when only is given
+        :return: dict of section name to value
+        """
         if string is None and file:
             string = file.read()
         if string is not None:
             self.setup(string=string)
-        return self._parse()
+        only = path_filter(only, pairs) if only is not None else None
+        self.only = only
+        self.normaliser = Normaliser(normalise) if normalise and only is None else None
+        try:
+            parsed = self._parse()
+            if self.normaliser is not None:
+                self.normaliser.finish(parsed)
+        finally:
+            self.only = self.normaliser = None
+        prune_skipped(parsed, only)
+        if normalise and only is not None:
+            for key, subkey in normalise.items():
+                normalise_tree(parsed, key, subkey)
+        return parsed
 
     # noinspection PyShadowingBuiltins
     def parsefile(self, file=None):
         return self.parse(file=file)
 
+    def events(self):
+        """
+        Pull parser generating (event, value) pairs for the whole input, see Event,
+        without building any containers or recursing per nesting level
+        Objects are reported as they appear, folding {} and <> contents into a dict or list
+        is left to the consumer (see build_events)
+        :return: generator of (event, value)
+        """
+        while not self.eos:
+            _ = self.match_whitespace()
+            if self.eos:
+                break
+            if self.atch == '#':
+                _ = self.match_to_character()
+                continue
+            if self.atch != '*':
+                raise self.error('Expected start of section marker "*"')
+            self.inc()
+            section_name = self.match_to_character('\t\n\r ')
+            yield Event.START_SECTION, section_name
+            self.recursion_level = 1
+            try:
+                for event in self.value_events():
+                    yield event
+            finally:
+                self.recursion_level = 0
+            yield Event.END_SECTION, section_name
+
+    def value_events(self):
+        """
+        Generate the events for a single value, using an explicit stack of open objects
+        """
+        _ = self.match_whitespace()
+        if self.eos or self.atch not in self.OBJ_START:
+            yield Event.SCALAR, self.decode_one_value()
+            return
+        stack = []
+        start = True
+        while True:
+            if start:
+                start_obj = self.nextch()
+                stack.append(self.OBJ_END[start_obj])
+                yield Event.START_OBJECT, start_obj
+                start = False
+            _ = self.match_whitespace()
+            ch = self.atch
+            if ch == stack[-1]:
+                self.inc()
+                stack.pop()
+                yield Event.END_OBJECT, ch
+                if not stack:
+                    return
+            elif ch in self.OBJ_START:                  # list context
+                start = True
+            else:                                       # dict context
+                key = self.decode_one_value()
+                _ = self.match_whitespace()
+                if self.atch != ',':                    # singleton value
+                    yield Event.SCALAR, key
+                else:
+                    self.inc()
+                    _ = self.match_whitespace()
+                    yield Event.KEY, str(key)
+                    if not self.eos and self.atch in self.OBJ_START:
+                        start = True
+                    else:
+                        yield Event.SCALAR, self.decode_one_value()
+
+    def index_sections(self):
+        """
+        Locate every top level section without decoding any values
+        :return: OrderedDict of section name to offset of its section marker
+        """
+        offsets = OrderedDict()
+        index = 0
+        while index < self.length:
+            index, state = scan_structure(self.buffer, index, patterns=self.patterns)
+            if state is not None:
+                break
+            self.index = index + 1
+            offsets[self.match_to_character('\t\n\r ')] = index
+            index = self.index
+        self.index = 0
+        return offsets
+
+    def parse_section_at(self, offset, only=None):
+        """
+        Parse the single top level section whose marker is at offset
+        :param int offset: position of the section marker
+        :param dict only: filter from path_filter() selecting the paths to decode
+        :return: dict of section name to value
+        """
+        self.index = offset
+        self.recursion_level = 0
+        self.only = only
+        try:
+            section = self.decode_one_value()
+        finally:
+            self.only = None
+        prune_skipped(section, only)
+        return section
+
+    def iter_sections(self, source, chunk_size=CHUNK_SIZE):
+        """
+        Parse a BACON file or stream one top level section at a time
+        Input is read in chunks and each section is parsed once the marker of the next section
+        (or end of input) is seen, so memory use depends on the largest section, not the file
+        Byte input, including named files, is decoded incrementally using the parser encoding
+        Positions reported in errors are relative to the start of the section
+        :param Any source: file or object with read
+        :param int chunk_size: size of each read
+        :return: generator of (section_name, value)
+        """
+        for text in self.iter_section_texts(source, chunk_size):
+            for section in self._parse_section(text):
+                yield section
+
+    def iter_section_texts(self, source, chunk_size=CHUNK_SIZE):
+        """
+        Read a BACON file or stream in chunks, as iter_sections
+        :param Any source: file or object with read
+        :param int chunk_size: size of each read
+        :return: generator of the text of each top level section (the first may be just comments)
+        """
+        if hasattr(source, 'read'):
+            self.set_filename(stream='stream')
+            for text in self._iter_section_texts(source, chunk_size):
+                yield text
+        else:
+            with open(source, 'rb') as fp:
+                self.set_filename(source)
+                for text in self._iter_section_texts(fp, chunk_size):
+                    yield text
+
+    def _iter_section_texts(self, fp, chunk_size):
+        encoding = self.encoding if self.encoding != UNICODE_ENCODING else 'utf8'
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending = []            # text of the section being read
+        state, in_header, in_name = None, False, False
+        eof = False
+        while not eof:
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            if isinstance(chunk, byte_types):
+                chunk = decoder.decode(chunk, final=eof)
+            start, index, length = 0, 0, len(chunk)
+            while index < length:
+                if in_name:     # section name runs to whitespace
+                    match = STR_PATTERNS.name_end.search(chunk, index)
+                    if match is None:
+                        break
+                    index, in_name = match.start(), False
+                index, state = scan_structure(chunk, index, state)
+                if state is not None:
+                    break
+                if not in_header:   # marker of the section being read
+                    in_header, in_name = True, True
+                    index += 1
+                else:               # marker of the next section
+                    pending.append(chunk[start:index])
+                    yield ''.join(pending)
+                    pending, start, in_header = [], index, False
+            pending.append(chunk[start:])
+        yield ''.join(pending)
+
+    def _setup_section(self, text):
+        filename = self._filename
+        self.setup(string=text)
+        self._filename = filename
+
+    def _parse_section(self, text):
+        self._setup_section(text)
+        return self._parse().items()
+
+    def transcode(self, out, source=None, ndjson=False, chunk_size=CHUNK_SIZE, **kwargs):
+        """
+        Write BACON as JSON without building the parsed tree, see encode_events
+        The result is json.dumps(parse()), except that a repeated section is written again
+        :param Any out: text file or object with write
+        :param Any source: file or object with read, read in chunks a section at a time,
+                           else the input already set up is transcoded from the start
+        :param bool ndjson: write one line of {"section": value} per section rather than one object
+        :param int chunk_size: size of each read
+        :param kwargs: as json.JSONEncoder, except indent and sort_keys
+        :return: number of sections written
+        """
+        if kwargs.get('indent') is not None or kwargs.get('sort_keys'):
+            raise ValueError('transcode() does not support indent or sort_keys')
+        separators = kwargs.pop('separators', None) or DEFAULT_SEPARATORS
+        encode = json.JSONEncoder(separators=separators, **kwargs).encode
+        if source is None:
+            self.index = 0
+            sections = encode_events(self.events(), encode, separators)
+        else:
+            sections = (section for text in self.iter_section_texts(source, chunk_size)
+                        for section in encode_events(self._section_events(text), encode, separators))
+        count = 0
+        try:
+            for name, text in sections:
+                if ndjson:
+                    out.write('{' + encode(name) + separators[1] + text + '}\n')
+                else:
+                    out.write(('{' if not count else separators[0]) + encode(name) + separators[1] + text)
+                count += 1
+        finally:
+            self.index = 0
+        if not ndjson:
+            out.write('}' if count else '{}')
+        return count
+
+    def _section_events(self, text):
+        self._setup_section(text)
+        return self.events()
+
+
+class ScannerParser(Parser):
+    """
+    Regex driven BACON parser
+    Consumes whole tokens using compiled patterns rather than character by character,
+    with the same results, error messages and index positions as Parser
+
+    With mapped=True a named source file is memory mapped rather than read, patterns run
+    over the mapped bytes, positions are byte offsets and only token slices are decoded
+    """
+    engine = ENGINE_SCANNER
+
+    def setup(self, string=None, source=None, encoding=None):
+        if self.mapped and not string and source is not None and not hasattr(source, 'read'):
+            if encoding:
+                self.encoding = encoding
+            self.map_file(source)
+        else:
+            super(ScannerParser, self).setup(string=string, source=source, encoding=encoding)
+
+    def map_file(self, filename):
+        encoding = self.encoding if self.encoding != UNICODE_ENCODING else 'utf8'
+        if '"*\\{}<>\n'.encode(encoding) != b'"*\\{}<>\n':
+            raise ValueError('Memory mapped input requires an ASCII compatible encoding, not {}'.format(encoding))
+        with open(filename, 'rb') as fp:
+            self.set_filename(filename)
+            size = os.fstat(fp.fileno()).st_size
+            # empty files cannot be mapped
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.buffer, self.patterns = buffer, BYTE_PATTERNS
+        self.string = MappedText(buffer, encoding)
+        self.lines = LineIndex(buffer, b'\n')
+        self.length = size
+        self.index = 0
+
+    def match_string(self):
+        start_index = self.index
+        quote = self.atch
+        if quote not in '"\'':
+            raise self.error("String must start with a quote")
+        pattern, buffer, string = self.patterns.string[quote], self.buffer, self.string
+        chunks = []
+        index = start_index + 1
+        while True:
+            match = pattern.match(buffer, index)
+            if match is None:
+                self.index = self.length
+                raise self.error('unexpected end of string')
+            end = match.end(1)
+            if end > index:
+                chunks.append(string[index:end])
+            self.index = match.end()
+            terminator = match.lastindex
+            if terminator == 2:     # reached the end of the string
+                return ''.join(chunks)
+            elif terminator == 3:   # backslash
+                chunks.append(self.match_escape())
+            else:
+                raise self.error('Invalid control character')
+            index = self.index
+
+    def match_integer(self):
+        start = self.index
+        self.index = self.patterns.integer.match(self.buffer, start).end()
+        return self.string[start:self.index]
+
+    def match_whitespace(self):
+        start = self.index
+        self.index = self.patterns.whitespace.match(self.buffer, start).end()
+        return self.string[start:self.index]
+
+    def match_to_character(self, chars='\n'):
+        pattern = self.patterns.to_character(chars)
+        start = self.index
+        match = pattern.search(self.buffer, start)
+        if match is None:
+            self.index = self.length
+            return self.string[start:]
+        self.index = match.end()
+        return self.string[start:match.start()]
+
+    def parse_string(self):
+        # only attempt a string where there is a quote, avoiding a formatted error per value
+        trunks = []
+        string = self.string
+        while not self.eos and string[self.index] in '"\'':
+            before = self.index
+            try:
+                _string = self.match_string()
+                _ = self.match_whitespace()
+                trunks.append(_string)
+            except ValueError:
+                self.index = before
+                break
+            if not _string:
+                break
+        return ''.join(trunks)
+
+    decode_func_map = dict(Parser.decode_func_map)
+    decode_func_map['"'] = parse_string
+
+
+class IterativeParser(ScannerParser):
+    """
+    Regex driven BACON parser decoding nested objects with an explicit stack instead of
+    recursing per nesting level, so there is no depth limit; results are identical to Parser
+    """
+    engine = ENGINE_ITERATIVE
+
+    def parse_object(self):
+        if self.atch not in self.OBJ_START:
+            raise self.error('Expecting start of object {}'.format(self.OBJ_START))
+        normaliser = self.normaliser
+        stack = []
+        frame = self._object_frame(self.only)
+        while True:
+            _ = self.match_whitespace()
+            ch = self.atch
+            if ch == frame[3]:
+                self.inc()
+                value = fold_object(frame[0], frame[1])
+                if normaliser is not None:
+                    normaliser.close(value, frame[0], frame[1], frame[5])
+                if not stack:
+                    return value
+                frame = stack.pop()
+                if frame[2] is None:
+                    frame[1].append(value)
+                else:
+                    frame[0][frame[2]] = value
+                    frame[2] = None
+
+            elif ch in self.OBJ_START:                  # list context
+                stack.append(frame)
+                frame = self._object_frame(frame[4])
+
+            else:                                       # dict context
+                frame = self._parse_pair(frame, stack)
+
+    def _object_frame(self, only):
+        """
+        :param only: path filter of the object
+        :return: [out_dict, out_list, key awaiting a nested value, end of object, path filter,
+                  normaliser mark] of the object starting at the current character, consumed
+        """
+        return [{}, [], None, self.OBJ_END[self.nextch()], only,
+                self.normaliser.mark() if self.normaliser is not None else 0]
+
+    def _parse_pair(self, frame, stack):
+        """
+        Decode a singleton value, or a key and its value, into frame
+        :return: frame to continue in, that of the value when it is an object
+        """
+        key = self.decode_one_value()
+        _ = self.match_whitespace()
+        if self.atch != ',':                    # singleton value
+            frame[1].append(key)
+            return frame
+        self.inc()
+        _ = self.match_whitespace()
+        # coerce key to str
+        key, only = str(key), frame[4]
+        if only is not None:
+            only = select_path(only, key)
+            if only is SKIPPED:
+                self.skip_value()
+                frame[0][key] = SKIPPED
+                return frame
+        if not self.eos and self.atch in self.OBJ_START:
+            frame[2] = key
+            stack.append(frame)
+            return self._object_frame(only)
+        frame[0][key] = self.decode_one_value()
+        return frame
+
+    decode_func_map = dict(ScannerParser.decode_func_map)
+    decode_func_map['{'] = decode_func_map['<'] = parse_object
+
+
+ENGINES = {
+    ENGINE_CHAR: Parser,
+    ENGINE_SCANNER: ScannerParser,
+    ENGINE_ITERATIVE: IterativeParser,
+}
+
+
+def merge_list(to_merge, subkey):
+    """convert a list of items into a dict keyed by the value of a common attribute"""
+    result = {}
+    for item in to_merge:
+        result[item[subkey]] = item
+    return result
+
+
+def normalise_tree(element, key, subkey):
+    """merge lists held under key into dicts, stopping at the outermost key found"""
+    if isinstance(element, dict):
+        if key in element:
+            try:
+                element[key] = merge_list(element[key], subkey)
+            except KeyError:
+                pass
+        else:
+            for k, v in element.items():
+                normalise_tree(v, key, subkey)
+    elif isinstance(element, list):
+        for v in element:
+            normalise_tree(v, key, subkey)
+
+
+class Normaliser(object):
+    """
+    Apply normalise_tree() for each key, subkey pair to a tree while it is parsed, merging
+    lists as the dicts holding them are closed rather than in a second pass over the tree
+    Merges made beneath a dict that itself holds the key are undone when that dict closes,
+    as normalise_tree stops at the outermost dict holding the key
+    """
+    def __init__(self, pairs):
+        self.pairs = list(pairs.items())
+        # (key, dict holding key, unmerged value, error deferred until known to be outermost)
+        self.records = []
+
+    def mark(self):
+        """:return: position marking the records made beneath an object being opened"""
+        return len(self.records)
+
+    def close(self, value, out_dict, out_list, mark):
+        """
+        Normalise a closed object
+        :param Any value: fold_object(out_dict, out_list)
+        :param dict out_dict: dict context contents of the object
+        :param list out_list: list context contents of the object
+        :param int mark: mark() when the object was opened
+        """
+        records = self.records
+        if len(records) > mark and value is out_dict and out_list:
+            self._adopt(value, out_list, mark)
+        if not isinstance(value, dict):
+            return
+        for key, subkey in self.pairs:
+            if key not in value or value[key] is SKIPPED:
+                continue
+            kept = []
+            for record in records[mark:]:
+                if record[0] == key:
+                    record[1][key] = record[2]
+                else:
+                    kept.append(record)
+            records[mark:] = kept
+            original, error = value[key], None
+            try:
+                value[key] = merge_list(original, subkey)
+            except KeyError:
+                pass
+            except TypeError as exc:
+                error = exc
+            records.append((key, value, original, error))
+
+    def _adopt(self, value, out_list, mark):
+        """dicts collapsed into value by fold_list carry their records with them"""
+        records = self.records
+        children = set(id(item) for item in out_list if isinstance(item, dict))
+        for index in range(mark, len(records)):
+            key, holder, original, error = records[index]
+            if id(holder) in children and key in value and value[key] is holder[key]:
+                records[index] = key, value, original, error
+
+    def finish(self, tree):
+        """
+        Normalise the top level dict of sections, then raise any error normalise_tree would have
+        :param dict tree: parsed sections
+        """
+        self.close(tree, tree, [], 0)
+        records, self.records = self.records, []
+        failed = [record for record in records if record[3] is not None]
+        if not failed:
+            return
+        # values replaced by duplicate keys or dropped by fold_object were never in the tree
+        reachable, stack = set(), [tree]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                reachable.add(id(value))
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
+        for key, _ in self.pairs:
+            for record in failed:
+                if record[0] == key and id(record[1]) in reachable:
+                    raise record[3]
+
+
+# memory mode: strings up to this length are interned, keys always are
+INTERN_MAX_LENGTH = 64
+try:
+    array('q')
+    ARRAY_INT = 'q'
+except ValueError:      # python 2, long is 64 bits on 64 bit unix
+    ARRAY_INT = 'l'
+ARRAY_INT_MIN, ARRAY_INT_MAX = -2 ** (8 * array(ARRAY_INT).itemsize - 1), 2 ** (8 * array(ARRAY_INT).itemsize - 1) - 1
+
+
+def make_interner():
+    """:return: function returning one shared copy of equal strings"""
+    if hasattr(sys, 'intern'):
+        return sys.intern
+    table = {}      # python 2 intern() only takes byte strings
+    return lambda string: table.setdefault(string, string)
+
+
+class NumberArray(Sequence):
+    """
+    Read only list of numbers held in an array, as lists of ints or floats are in memory mode
+    Compares equal to the list it replaced, and is shown as that list
+    """
+    __slots__ = ('array',)
+
+    def __init__(self, typecode, values):
+        self.array = array(typecode, values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.array[index].tolist()
+        return self.array[index]
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __eq__(self, other):
+        if isinstance(other, NumberArray):
+            return self.array == other.array
+        if isinstance(other, list):
+            return self.array.tolist() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def tolist(self):
+        return self.array.tolist()
+
+    def __repr__(self):
+        return repr(self.array.tolist())
+
+
+def number_typecode(values):
+    """:return: array typecode able to hold every value in a list, or None"""
+    kinds = set(type(value) for value in values)
+    if kinds == {float}:
+        return 'd'
+    if kinds == {int} and ARRAY_INT_MIN <= min(values) and max(values) <= ARRAY_INT_MAX:
+        return ARRAY_INT
+    return None
+
+
+def compact_tree(value, intern=None):
+    """
+    Memory mode: share keys and short string values, and hold lists of ints or floats in NumberArray
+    :param Any value: parsed (sub)tree
+    :param callable intern: from make_interner(), shared across trees to share their strings too
+    :return: compacted tree, dicts and lists are replaced
+    """
+    intern = intern or make_interner()
+
+    def _compact(_value):
+        if type(_value) is dict:
+            return dict((intern(key) if isinstance(key, string_types) else key, _compact(item))
+                        for key, item in _value.items())
+        if type(_value) is list:
+            typecode = number_typecode(_value) if _value else None
+            if typecode is not None:
+                return NumberArray(typecode, _value)
+            return [_compact(item) for item in _value]
+        if isinstance(_value, string_types) and len(_value) <= INTERN_MAX_LENGTH:
+            return intern(_value)
+        return _value
+
+    return _compact(value)
+
+
+# shared by all memory mode trees
+INTERN = make_interner()
+
+
+class LazySections(MutableMapping):
+    """
+    Top level sections of a BACON file, indexed up front but each parsed on first access
+    """
+
+    def __init__(self, parser, only=None, pairs=None):
+        self.parser = parser
+        self.only = path_filter(only, pairs) if only is not None else None
+        self.offsets = parser.index_sections()
+        if self.only is not None:
+            for name in [name for name in self.offsets if select_path(self.only, name) is SKIPPED]:
+                del self.offsets[name]
+        self.sections = {}
+        self.pairs = []     # normalisation pending for sections not yet parsed
+        self.compact = False
+
+    def __getitem__(self, name):
+        try:
+            return self.sections[name]
+        except KeyError:
+            offset = self.offsets[name]
+        value = self.parser.parse_section_at(offset, self.only)[name]
+        for key, subkey in self.pairs:
+            normalise_tree(value, key, subkey)
+        if self.compact:
+            value = compact_tree(value, INTERN)
+        self.sections[name] = value
+        return value
+
+    def __setitem__(self, name, value):
+        self.offsets.setdefault(name, None)
+        self.sections[name] = value
+
+    def __delitem__(self, name):
+        del self.offsets[name]
+        self.sections.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def normalise(self, pairs):
+        """normalise_tree applied to every section, as each is parsed"""
+        for key, subkey in pairs.items():
+            if key in self.offsets:     # a section itself is the outermost key
+                try:
+                    self[key] = merge_list(self[key], subkey)
+                except KeyError:
+                    pass
+                continue
+            for value in self.sections.values():
+                normalise_tree(value, key, subkey)
+            self.pairs.append((key, subkey))
+
+    def __repr__(self):
+        return '<LazySections {} parsed={}/{}>'.format(self.parser.basename, len(self.sections), len(self))
+
+
+SIMPLE_PATH_STEP = re.compile(r'(\.)?(?:([A-Za-z_][A-Za-z0-9_]*)|\[(\d+)\])')
+SIMPLE_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# names the jsonpath lexer treats as keywords or booleans
+JSONPATH_KEYWORD = re.compile(r'^(?:where$|true|false)')
+
+
+class SimplePath(object):
+    """
+    Natively evaluated subset of JSONPath: an optional $ root followed by .field and [index]
+    steps, without quoting, wildcards, slices or filters.
+    Lookups behave exactly as the equivalent jsonpath_rw Fields and Index steps
+    """
+    def __init__(self, steps):
+        self.steps = steps
+        self.key = steps_key(steps)
+
+    @classmethod
+    def compile(cls, path):
+        """
+        :param str path: JSONPath expression
+        :return: SimplePath, or None if the path is not in the simple subset
+        """
+        if not path:
+            return None
+        steps = []
+        index = 1 if path.startswith('$') else 0
+        while index < len(path):
+            match = SIMPLE_PATH_STEP.match(path, index)
+            if match is None:
+                return None
+            dot, field, number = match.groups()
+            if number is not None:
+                if dot or index == 0:
+                    return None
+                steps.append(int(number))
+            elif bool(dot) == (index == 0) or JSONPATH_KEYWORD.match(field):
+                return None
+            else:
+                steps.append(field)
+            index = match.end()
+        return cls(steps)
+
+    def values(self, value):
+        """
+        :param Any value: tree to search
+        :return: list of the (zero or one) matching values
+        """
+        for step in self.steps:
+            if isinstance(step, int):
+                if len(value) <= step:
+                    return []
+                value = value[step]
+            else:
+                try:
+                    value = value[step]
+                except (TypeError, KeyError, AttributeError):
+                    return []
+        return [value]
+
+
+def path_key(prefix, key):
+    """
+    :param str prefix: path key of the parent
+    :param Any key: dict key or list index
+    :return: path key (A.B[0].C) of the child, non-identifier keys are quoted (A['b c'])
+    """
+    if isinstance(key, int):
+        return '{}[{}]'.format(prefix, key)
+    if SIMPLE_KEY.match(key):
+        return '{}.{}'.format(prefix, key) if prefix else key
+    return "{}['{}']".format(prefix, key)
+
+
+def steps_key(steps):
+    """
+    :param list steps: dict keys and list indices from the root
+    :return: path key
+    """
+    key = ''
+    for step in steps:
+        key = path_key(key, step)
+    return key
+
+
+def flatten_tree(value, prefix=''):
+    """
+    :param Any value: (sub)tree to flatten
+    :param str prefix: path key of value
+    :return: list of (path key, value) for every leaf, including empty dicts and lists
+    """
+    leaves, stack = [], [(prefix, value)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, (dict, MutableMapping)) and value:
+            stack.extend((path_key(path, key), item) for key, item in value.items())
+        elif isinstance(value, (list, NumberArray)) and value:
+            stack.extend((path_key(path, index), item) for index, item in enumerate(value))
+        else:
+            leaves.append((path, value))
+    return leaves
+
+
+JSONPATH_CACHE_SIZE = 256
+_jsonpath_cache = OrderedDict()
+_jsonpath_lock = threading.Lock()
+
+
+def compile_path(path):
+    """
+    :param str path: JSONPath expression
+    :return: compiled expression (a SimplePath where possible), from a bounded LRU cache
+    """
+    with _jsonpath_lock:
+        jpath = _jsonpath_cache.pop(path, None)
+        if jpath is not None:
+            _jsonpath_cache[path] = jpath
+            return jpath
+    jpath = SimplePath.compile(path) or jsonpath.parse(path)
+    with _jsonpath_lock:
+        _jsonpath_cache[path] = jpath
+        while len(_jsonpath_cache) > JSONPATH_CACHE_SIZE:
+            _jsonpath_cache.popitem(last=False)
+    return jpath
+
+
+class PathIndex(object):
+    """
+    Flattened index of a parsed tree mapping the path key of every leaf to its value,
+    with the keys also held sorted for prefix scans
+    """
+    MISSING = object()
+
+    def __init__(self, tree):
+        self.leaves = dict(flatten_tree(tree))
+        self.keys = sorted(self.leaves)
+
+    @staticmethod
+    def to_key(path):
+        """
+        :param str path: simple JSONPath ($.A.B[0]) or path key
+        :return: path key
+        """
+        jpath = compile_path(path)
+        return jpath.key if isinstance(jpath, SimplePath) else path
+
+    def get(self, path, default=None):
+        """
+        :param str path: JSONPath expression
+        :return: value of the leaf at path, or default if path is not simple or not a leaf
+        """
+        jpath = compile_path(path)
+        if not isinstance(jpath, SimplePath):
+            return default
+        return self.leaves.get(jpath.key, default)
+
+    def _ranges(self, key):
+        """:return: (start, end) ranges of self.keys for the leaves at and below key"""
+        keys = self.keys
+        if not key:
+            return [(0, len(keys))]
+        start = bisect.bisect_left(keys, key)
+        ranges = [(start, start + 1)] if start < len(keys) and keys[start] == key else []
+        for child, beyond in ((key + '.', key + '/'), (key + '[', key + '\\')):
+            ranges.append((bisect.bisect_left(keys, child), bisect.bisect_left(keys, beyond)))
+        return ranges
+
+    def prefix(self, path):
+        """
+        :param str path: simple JSONPath or path key
+        :return: sorted list of (path key, value) for the leaves at and below path
+        """
+        keys = self.keys
+        return [(key, self.leaves[key])
+                for start, end in self._ranges(self.to_key(path)) for key in keys[start:end]]
+
+    def _remove(self, key):
+        for start, end in reversed(self._ranges(key)):
+            for leaf in self.keys[start:end]:
+                del self.leaves[leaf]
+            del self.keys[start:end]
+
+    def _add(self, leaves):
+        self.leaves.update(leaves)
+        if len(leaves) > len(self.keys) // 8:
+            self.keys = sorted(self.leaves)
+        else:
+            for key, _ in leaves:
+                bisect.insort(self.keys, key)
+
+    def refresh(self, tree, node):
+        """
+        Re-index the subtree at node
+        :param dict tree: patched tree
+        :param list node: dict keys and list indices from the root
+        """
+        value = tree
+        for step in node:
+            try:
+                value = value[step]
+            except (KeyError, IndexError, TypeError):
+                value = self.MISSING
+                break
+        key = steps_key(node)
+        self._remove(key)
+        if value is not self.MISSING:
+            self._add(flatten_tree(value, key))
+
+    def update(self, delta, tree):
+        """
+        Incrementally re-index the parts of tree changed by a dictdiffer delta
+        :param list delta: delta as applied by dictdiffer.patch
+        :param dict tree: patched tree
+        """
+        for action, node, changes in delta:
+            if isinstance(node, string_types):
+                node = node.split('.') if node else []
+            # resolve the node as dictdiffer does, converting list indices
+            steps, value = [], tree
+            for step in node or []:
+                if isinstance(value, list):
+                    step = int(step)
+                steps.append(step)
+                value = value[step]
+            if action == 'change' or not isinstance(value, dict) or not value or \
+                    steps_key(steps) in self.leaves:     # list, or a dict emptied or filled
+                self.refresh(tree, steps)
+            else:
+                for child, _ in changes:
+                    self.refresh(tree, steps + [child])
+
 
 # noinspection PyClassHasNoInit
 class MatchType:
@@ -505,39 +1969,529 @@ class MatchType:
     CUSTOM = 'custom'
 
 
+class ParseCache(object):
+    """
+    Process wide LRU cache of parsed BACON files keyed on file identity
+    (realpath, size, mtime, encoding, normalised) so that unchanged files are not re-read.
+    Entries are held marshalled, which both measures their size against the byte budget
+    and ensures that every hit hands out a private copy that may be patched in place.
+    Disabled until given a maxsize and/or maxbytes
+    """
+    def __init__(self, maxsize=0, maxbytes=None):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.maxsize, self.maxbytes = 0, None
+        self.configure(maxsize, maxbytes)
+
+    @property
+    def enabled(self):
+        return bool(self.maxsize or self.maxbytes)
+
+    def configure(self, maxsize=None, maxbytes=None):
+        """
+        :param int maxsize: maximum number of entries, 0 for no limit
+        :param int maxbytes: maximum total size of (marshalled) entries, None for no limit
+        the cache is disabled when neither limit is set
+        """
+        with self.lock:
+            self.maxsize, self.maxbytes = maxsize or 0, maxbytes
+            self._evict()
+
+    @staticmethod
+    def key(path, encoding=None, normalise=False):
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        mtime_ns = getattr(stat, 'st_mtime_ns', None)
+        if mtime_ns is None:    # python 2
+            mtime_ns = int(stat.st_mtime * 1000000000)
+        return path, stat.st_size, mtime_ns, encoding or DEFAULT_ENCODING, bool(normalise)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self.lock:
+            data = self.entries.pop(key, None)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries[key] = data      # most recently used
+            self.hits += 1
+        return marshal.loads(data)
+
+    def put(self, key, parsed):
+        if not self.enabled:
+            return
+        try:
+            data = marshal.dumps(parsed)
+        except ValueError:      # not a plain tree
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous)
+            self.entries[key] = data
+            self.nbytes += len(data)
+            self._evict()
+
+    def _over_limit(self):
+        """:return: whether the entries exceed either limit"""
+        if self.maxsize and len(self.entries) > self.maxsize:
+            return True
+        return self.maxbytes is not None and self.nbytes > self.maxbytes
+
+    def _evict(self):
+        while self.entries and self._over_limit():
+            _, data = self.entries.popitem(last=False)
+            self.nbytes -= len(data)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    entries=len(self.entries), bytes=self.nbytes)
+
+    def __repr__(self):
+        return '<ParseCache maxsize={} maxbytes={} {}> at 0x{:x}'.format(
+            self.maxsize, self.maxbytes, self.stats(), id(self))
+
+
+PARSE_CACHE = ParseCache()
+
+SIDECAR_SUFFIX = '.bcache'
+SIDECAR_MAGIC = b'BACONC'
+SIDECAR_VERSION = 1
+# magic, version, python tag, encoding, normalised, source size, source mtime_ns, source sha1
+SIDECAR_HEADER = struct.Struct(str('<6sH8s16s?Qq20s'))
+# marshal formats are specific to the python implementation and version
+PYTHON_TAG = '{}{}{}'.format(platform.python_implementation()[:2], *sys.version_info[:2]).lower().encode('ascii')
+
+_replace = getattr(os, 'replace', os.rename)    # python 2 has no os.replace
+
+
+def sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def file_digest(path, algorithm='sha1', chunk_size=CHUNK_SIZE):
+    """
+    :param str path: file to hash
+    :param str algorithm: hashlib algorithm
+    :param int chunk_size: read size
+    :return: digest of the file contents
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def load_sidecar(key):
+    """
+    Load a parsed tree from the sidecar of a BACON file
+    The sidecar is accepted if its header matches this python and the source size;
+    the source is only hashed (and compared) if its mtime has changed
+    :param tuple key: ParseCache.key() of the source file
+    :return: parsed tree, or None if there is no valid sidecar
+    """
+    path, size, mtime_ns, encoding, normalised = key
+    try:
+        with open(sidecar_path(path), 'rb') as fp:
+            header = fp.read(SIDECAR_HEADER.size)
+            if len(header) != SIDECAR_HEADER.size:
+                return None
+            magic, version, tag, enc, norm, c_size, c_mtime_ns, digest = SIDECAR_HEADER.unpack(header)
+            if (magic, version, tag.rstrip(b'\0'), enc.rstrip(b'\0'), norm, c_size) != \
+                    (SIDECAR_MAGIC, SIDECAR_VERSION, PYTHON_TAG, encoding.encode('ascii', 'replace')[:16],
+                     normalised, size):
+                return None
+            if c_mtime_ns != mtime_ns and digest != file_digest(path):
+                return None
+            data = fp.read()
+    except (OSError, IOError, struct.error):
+        return None
+    try:
+        return marshal.loads(data)
+    except (ValueError, EOFError, TypeError):
+        logging.debug('Corrupt sidecar for %s', path)
+        return None
+
+
+def save_sidecar(key, parsed):
+    """
+    Write a parsed tree to the sidecar of a BACON file (atomically)
+    :param tuple key: ParseCache.key() of the source file, taken before it was parsed
+    :param dict parsed: parsed tree
+    :return: True if written
+    """
+    path, size, mtime_ns, encoding, normalised = key
+    try:
+        data = marshal.dumps(parsed)
+        digest = file_digest(path)
+        if ParseCache.key(path, encoding, normalised) != key:   # changed since parsed
+            return False
+    except (ValueError, OSError, IOError):
+        return False
+    header = SIDECAR_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, PYTHON_TAG,
+                                 encoding.encode('ascii', 'replace')[:16], normalised, size, mtime_ns, digest)
+    target = sidecar_path(path)
+    temp = '{}.{}.tmp'.format(target, os.getpid())
+    try:
+        with open(temp, 'wb') as fp:
+            fp.write(header)
+            fp.write(data)
+        _replace(temp, target)
+    except (OSError, IOError) as exc:
+        logging.debug('Unable to write sidecar %s: %s', target, exc)
+        try:
+            os.remove(temp)
+        except (OSError, IOError):
+            pass
+        return False
+    return True
+
+
+# writer layout
+DUMP_INDENT = 4
+# characters escaped in written strings, those without a BACKSLASH form as \\uXXXX
+DUMP_ESCAPE = re.compile(r'[\\"\x00-\x1f]')
+SECTION_NAME_END = re.compile(r'[\t\n\r ]')
+
+
+def dump_scalar(value):
+    """:return: BACON text of a string, number, bool or None"""
+    if isinstance(value, string_types):
+        return '"' + DUMP_ESCAPE.sub(
+            lambda match: ESCAPE_Python_2_Text.get(match.group(), '\\u{:04x}'.format(ord(match.group()))), value) + '"'
+    if value is None:
+        return 'null'
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if value != value or value in (INFINITY, NEG_INFINITY):
+            raise ValueError('{!r} cannot be written as BACON'.format(value))
+        return repr(value)
+    if isinstance(value, integer_types):
+        return str(value)
+    raise TypeError('{!r} cannot be written as BACON'.format(value))
+
+
+def _unmerge(item, subkey):
+    """:return: list of the items merge_list() keyed by subkey, else item unchanged"""
+    if subkey is not None and isinstance(item, dict) and \
+            all(isinstance(merged, dict) and merged.get(subkey) == name for name, merged in item.items()):
+        return list(item.values())
+    return item
+
+
+def _dump_parts(value, indent, pairs):
+    """
+    :return: generator of the text of a value, yielding (value, indent) for each nested object
+             rather than recursing, see iter_dump
+    """
+    pad = ' ' * indent
+    inner = pad + ' ' * DUMP_INDENT
+    if isinstance(value, (dict, MutableMapping)):
+        if not value:
+            yield '<>'
+            return
+        yield '<\n'
+        for key, item in value.items():
+            item = _unmerge(item, pairs.get(key))
+            if isinstance(item, (dict, MutableMapping, list, NumberArray)):
+                yield inner + '{  ' + dump_scalar(str(key)) + ',\n' + inner
+                yield item, indent + DUMP_INDENT
+                yield '\n' + inner + '}\n'
+            else:
+                yield inner + '{  ' + dump_scalar(str(key)) + ',  ' + dump_scalar(item) + '  }\n'
+        yield pad + '>'
+    elif isinstance(value, (list, NumberArray)):
+        if not value:
+            yield '{}'
+            return
+        yield '{\n'
+        last = len(value) - 1
+        for index, item in enumerate(value):
+            yield inner
+            if isinstance(item, (dict, MutableMapping, list, NumberArray)):
+                yield item, indent + DUMP_INDENT
+            elif item and isinstance(item, string_types) and index < last and \
+                    isinstance(value[index + 1], string_types):
+                yield dump_scalar(item) + ' ""'   # an empty string ends a run of adjacent strings
+            else:
+                yield dump_scalar(item)
+            yield '\n'
+        yield pad + '}'
+    else:
+        yield dump_scalar(value)
+
+
+def iter_dump(tree, pairs=None):
+    """
+    Write a parsed tree as BACON, a section at a time, without recursing per nesting level
+    Dicts are written as <> objects of { "key", value } entries and lists as {} objects,
+    so reading the text back gives the tree, except where BACON folding cannot tell
+    (lists only holding lists or dicts with distinct keys, empty lists)
+    :param dict tree: section name to value
+    :param dict pairs: normalisation spec (see normalise_tree) the tree is normalised with, merged lists
+                       are written as lists again
+    :return: generator of text fragments
+    """
+    pairs = pairs or {}
+    for name, value in tree.items():
+        if not isinstance(name, string_types) or not name or SECTION_NAME_END.search(name):
+            raise ValueError('{!r} cannot be written as a BACON section name'.format(name))
+        if not isinstance(value, (dict, MutableMapping, list, NumberArray)):
+            yield '*' + name + '  ' + dump_scalar(value) + '\n'
+            continue
+        yield '*' + name + '\n'
+        stack = [_dump_parts(value, 0, pairs)]
+        while stack:
+            try:
+                part = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+            if isinstance(part, string_types):
+                yield part
+            else:
+                stack.append(_dump_parts(part[0], part[1], pairs))
+        yield '\n'
+
+
+def dump(tree, fp, pairs=None, buffer_size=CHUNK_SIZE):
+    """
+    Write a parsed tree as BACON through a write buffer, see iter_dump
+    :param dict tree: section name to value
+    :param Any fp: text file or object with write
+    :param dict pairs: normalisation spec of the tree
+    :param int buffer_size: characters collected per write
+    """
+    buffered, size = [], 0
+    for part in iter_dump(tree, pairs):
+        buffered.append(part)
+        size += len(part)
+        if size >= buffer_size:
+            fp.write(''.join(buffered))
+            buffered, size = [], 0
+    if buffered:
+        fp.write(''.join(buffered))
+
+
+def dumps(tree, pairs=None):
+    """:return: a parsed tree as BACON text, see iter_dump"""
+    return ''.join(iter_dump(tree, pairs))
+
+
+def json_default(value):
+    """json.dumps default for memory mode trees"""
+    if isinstance(value, NumberArray):
+        return value.tolist()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
 class Bacon(object):
 
-    def __init__(self, string=None, source=None, encoding=None):
-        self.parser = Parser(string=string, source=source, encoding=encoding)
+    def __init__(self, string=None, source=None, encoding=None, engine=None, mapped=False, lazy=False,
+                 sidecar=False, index=False, single_pass=True, compact=False, defer_errors=False):
+        self._parser = None
+        self._parser_args = dict(string=string, source=source, encoding=encoding, engine=engine, mapped=mapped,
+                                 defer_errors=defer_errors)
         self.parsed = None
         self.normalised = False
+        self.lazy = lazy
+        self.sidecar = sidecar
+        self.indexed = index
+        self._path_index = None
+        # normalise devices while parsing rather than in a second pass
+        self.single_pass = single_pass
+        # memory mode, see compact_tree, the parsed tree is then read only
+        self.compact = compact
+        self.compacted = False
+
+    @property
+    def parser(self):
+        """the parser is only created (and its input read) when needed"""
+        if self._parser is None:
+            self._parser = Parser(**self._parser_args)
+        return self._parser
+
+    def _cache_key(self, normalise):
+        """key into PARSE_CACHE and the sidecar if this instance parses a named file, else None"""
+        source = self._parser_args['source']
+        if not (PARSE_CACHE.enabled or self.sidecar) or self.lazy or self._parser_args['string'] or \
+                source is None or hasattr(source, 'read'):
+            return None
+        try:
+            return PARSE_CACHE.key(source, self._parser_args['encoding'], normalise)
+        except (OSError, IOError):
+            return None
+
+    def _load_cached(self, cache_key):
+        parsed = PARSE_CACHE.get(cache_key)
+        if parsed is None and self.sidecar:
+            parsed = load_sidecar(cache_key)
+            if parsed is not None:
+                PARSE_CACHE.put(cache_key, parsed)
+        return parsed
+
+    def _store_cached(self, cache_key, parsed):
+        PARSE_CACHE.put(cache_key, parsed)
+        if self.sidecar:
+            save_sidecar(cache_key, parsed)
 
     # noinspection PyShadowingBuiltins
-    def parse(self, string=None, file=None, normalise=False):
+    def parse(self, string=None, file=None, normalise=False, only=None):
+        """
+        :param str string: string to parse, if not already parsed
+        :param Any file: file or object with read to parse, if not already parsed
+        :param bool normalise: normalise devices
+        :param list only: JSONPath or dot-notation prefixes (of the raw or normalised tree) of the
+                          only paths to decode, other subtrees are skipped (first parse only)
+        :return: parsed sections
+        """
+        cache_key = None
         if not self.parsed:
-            self.parsed = self.parser.parse(string=string, file=file)
+            if string is None and file is None and only is None:
+                cache_key = self._cache_key(normalise)
+                if cache_key is not None:
+                    self.parsed = self._load_cached(cache_key)
+                    if self.parsed is not None:
+                        self.normalised = bool(normalise)
+                        return self._compacted()
+            if self.lazy and string is None and file is None:
+                self.parsed = LazySections(self.parser, only=only, pairs=self.DEVICE_SPEC)
+                self.parsed.compact = self.compact
+            elif normalise and self.single_pass:
+                self.parsed = self.parser.parse(string=string, file=file, only=only, pairs=self.DEVICE_SPEC,
+                                                normalise=self.DEVICE_SPEC)
+                self.normalised = True
+            else:
+                self.parsed = self.parser.parse(string=string, file=file, only=only, pairs=self.DEVICE_SPEC)
         if normalise and not self.normalised:
             self.parsed = self.normalise_devices()
             self.normalised = True
+        if cache_key is not None:
+            self._store_cached(cache_key, self.parsed)
+        return self._compacted()
+
+    def _compacted(self):
+        """:return: the parsed tree, compacted first in memory mode (after caching, which needs plain lists)"""
+        if self.compact and not self.compacted and not isinstance(self.parsed, LazySections):
+            self.parsed = compact_tree(self.parsed, INTERN)
+            self._path_index = None
+        self.compacted = self.compact
         return self.parsed
 
+    def aparse(self, normalise=False, only=None, runner=None):
+        """
+        parse() in an executor, for asyncio (python 3), see pylib.abacon
+        :return: coroutine returning the parsed sections
+        """
+        from pylib.abacon import aparse
+        return aparse(self, normalise, only, runner)
+
+    @property
+    def path_index(self):
+        """flattened PathIndex of the parsed tree, built on first use"""
+        if self._path_index is None:
+            self._path_index = PathIndex(self.parse())
+        return self._path_index
+
     def patch(self, delta):
         self.parse()
-        return self.parsed if not delta else patch(delta, self.parsed, in_place=True)
+        if not delta:
+            return self.parsed
+        delta = list(delta)
+        patched = patch(delta, self.parsed, in_place=True)
+        if self._path_index is not None:
+            self._path_index.update(delta, patched)
+        return patched
 
     def json(self, **kwargs):
         parsed = self.parse()
+        if isinstance(parsed, LazySections):
+            parsed = dict(parsed)
+        kwargs.setdefault('default', json_default)
         return json.dumps(parsed, **kwargs)
 
+    def dump(self, fp, buffer_size=CHUNK_SIZE):
+        """
+        Write the parsed (and possibly patched) tree as BACON, see iter_dump
+        :param Any fp: text file or object with write
+        :param int buffer_size: characters collected per write
+        """
+        dump(self.parse(), fp, self.DEVICE_SPEC if self.normalised else None, buffer_size)
+
+    def dumps(self):
+        """:return: the parsed tree as BACON text"""
+        return dumps(self.parse(), self.DEVICE_SPEC if self.normalised else None)
+
+    def transcode(self, out, ndjson=False, **kwargs):
+        """
+        Write the input as JSON without parsing it into a tree, see Parser.transcode
+        A named file or stream not yet read is read in chunks, a section at a time
+        :param Any out: text file or object with write
+        :param bool ndjson: write one line per section
+        :param kwargs: as Parser.transcode
+        :return: number of sections written
+        """
+        args = self._parser_args
+        if self._parser is None and not args['string'] and args['source'] is not None:
+            parser = Parser(encoding=args['encoding'], engine=args['engine'], defer_errors=args['defer_errors'])
+            return parser.transcode(out, source=args['source'], ndjson=ndjson, **kwargs)
+        return self.parser.transcode(out, ndjson=ndjson, **kwargs)
+
     def find(self, path):
-        jpath = jsonpath.parse(path)
-        for found in jpath.find(self.parse()):
+        return self._search(path, self.parse())
+
+    def _search(self, path, parsed):
+        if self.indexed:
+            value = self.path_index.get(path, PathIndex.MISSING)
+            if value is not PathIndex.MISSING:
+                return str(value)
+        return self._find(path, parsed)
+
+    def find_prefix(self, path):
+        """
+        :param str path: simple JSONPath or path key (A.B[0])
+        :return: sorted list of (path key, value) for all leaves at and below path
+        """
+        return self.path_index.prefix(path)
+
+    @staticmethod
+    def _find(path, parsed):
+        jpath = compile_path(path)
+        if isinstance(jpath, SimplePath):
+            values = jpath.values(parsed)
+        else:
+            if isinstance(parsed, LazySections):     # jsonpath only descends into dicts
+                parsed = dict(parsed)
+            values = (found.value for found in jpath.find(parsed))
+        for value in values:
             try:
-                return str(found.value)
+                return str(value)
             except (AttributeError, KeyError):
                 pass
         return None
 
+    def find_many(self, paths):
+        """
+        :param iterable paths: JSONPath expressions
+        :return: list of find() results, one per path
+        """
+        parsed = self.parse()
+        results = {}
+        return [results[path] if path in results else results.setdefault(path, self._search(path, parsed))
+                for path in paths]
+
     MATCH = {
         MatchType.ABSENT:
             lambda found, match, matchfunc: False if found else True,
@@ -558,7 +2512,21 @@ class Bacon(object):
     }
 
     def matches(self, path, match=None, matchtype=None, matchfunc=None):
-        found = self.find(path)
+        return self._matches(self.find(path), match, matchtype, matchfunc)
+
+    def matches_many(self, rules):
+        """
+        :param iterable rules: matches() arguments per rule, either as a
+                               (path, match, matchtype, matchfunc) tuple (trailing items optional) or a dict
+        :return: list of (matched, found) results, one per rule
+        """
+        rules = [rule if isinstance(rule, dict) else dict(zip(('path', 'match', 'matchtype', 'matchfunc'), rule))
+                 for rule in rules]
+        found = self.find_many([rule['path'] for rule in rules])
+        return [self._matches(value, rule.get('match'), rule.get('matchtype'), rule.get('matchfunc'))
+                for value, rule in zip(found, rules)]
+
+    def _matches(self, found, match=None, matchtype=None, matchfunc=None):
         if matchfunc:
             return matchfunc(found, match), found
         if matchtype is None:
@@ -569,31 +2537,14 @@ class Bacon(object):
         """convert a list of items into a dict using a common attribute"""
         parsed = self.parse()
 
-        for key, subkey in pairs.items():
-
-            def merge_list(to_merge):
-                result = {}
-                for item in to_merge:
-                    result[item[subkey]] = item
-                return result
-
-            def flatten(element):
-                if isinstance(element, dict):
-                    if key in element:
-                        try:
-                            element[key] = merge_list(element[key])
-                        except KeyError:
-                            pass
-                    else:
-                        for k, v in element.items():
-                            flatten(v)
-                elif isinstance(element, list):
-                    for v in element:
-                        flatten(v)
-
-            flatten(parsed)
+        if isinstance(parsed, LazySections):
+            parsed.normalise(pairs)
+        else:
+            for key, subkey in pairs.items():
+                normalise_tree(parsed, key, subkey)
 
         self.parsed = parsed
+        self._path_index = None
         return parsed
 
     DEVICE_SPEC = {'DEVICES': 'DEVICE'}
@@ -606,10 +2557,231 @@ class Bacon(object):
         return '<Bacon {} len={}> at 0x{:x}'.format(self.parser.basename, self.parser.length, id(self))
 
 
+ParseResult = namedtuple('ParseResult', ('path', 'parsed', 'error'))
+
+
+def _parse_file(path, normalise=True, encoding=None, engine=None, sidecar=False):
+    """parse_many worker, errors are returned rather than raised so the batch continues"""
+    try:
+        parsed = Bacon(source=path, encoding=encoding, engine=engine, sidecar=sidecar).parse(normalise=normalise)
+        return ParseResult(path, parsed, None)
+    except Exception as exc:
+        return ParseResult(path, None, exc)
+
+
+def parse_many(paths, workers=None, normalise=True, encoding=None, engine=None, sidecar=False):
+    """
+    Parse many BACON files in parallel worker processes
+    :param iterable paths: files to parse
+    :param int workers: number of worker processes (default cpu count), 0 to parse in this process
+    :param bool normalise: normalise devices
+    :param str encoding: file encoding
+    :param str engine: parser engine
+    :param bool sidecar: use sidecar caches
+    :return: generator of ParseResult(path, parsed, error) in order of completion, where error
+             is the exception (with parser error context) raised parsing that file, else None
+    """
+    if workers == 0:
+        for path in paths:
+            yield _parse_file(path, normalise, encoding, engine, sidecar)
+        return
+    if futures is None:
+        raise RuntimeError('parse_many requires concurrent.futures (the futures package on python 2)')
+    executor = futures.ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    try:
+        for path in paths:
+            pending[executor.submit(_parse_file, path, normalise, encoding, engine, sidecar)] = path
+        for future in futures.as_completed(list(pending)):
+            path = pending.pop(future)
+            try:
+                yield future.result()
+            except Exception as exc:    # worker failure, e.g. a broken pool or unpicklable result
+                yield ParseResult(path, None, exc)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
 def clean_counts(value):
     return value is not None and value != 'COMMAND_COUNTS'
 
 
+def same_content(path1, path2, block_size=16 * CHUNK_SIZE):
+    """
+    Compare two files without parsing them: sizes first, then their contents block by block
+    :param str path1: first file
+    :param str path2: second file
+    :param int block_size: read size
+    :return: True if the files are byte identical
+    """
+    if os.path.realpath(path1) == os.path.realpath(path2):
+        return True
+    if os.stat(path1).st_size != os.stat(path2).st_size:
+        return False
+    with open(path1, 'rb') as fp1, open(path2, 'rb') as fp2:
+        while True:
+            block = fp1.read(block_size)
+            if block != fp2.read(block_size):
+                return False
+            if not block:
+                return True
+
+
+SCALAR_TYPES = string_types + byte_types + (int, float, bool, type(None))
+
+
+def copy_tree(value):
+    """deepcopy() specialised for parsed trees of dicts, lists and scalars"""
+    if type(value) is dict:
+        return dict((key, copy_tree(item)) for key, item in value.items())
+    if type(value) is list:
+        return [copy_tree(item) for item in value]
+    return value if isinstance(value, SCALAR_TYPES) else deepcopy(value)
+
+
+def dotted_path(path, dot_notation=True):
+    """:return: path as reported by dictdiffer, dotted if possible and requested, else a list"""
+    if dot_notation and all(isinstance(key, string_types) and '.' not in key for key in path):
+        return '.'.join(path)
+    return list(path)
+
+
+def _diff_keys(first, second):
+    """
+    :return: (common, added, removed) keys of two dicts or indices of two lists, in the order
+             dictdiffer reports them, or None for other values
+    """
+    if isinstance(first, MutableMapping) and isinstance(second, MutableMapping):
+        return ([key for key in first if key in second], [key for key in second if key not in first],
+                [key for key in first if key not in second])
+    if isinstance(first, MutableSequence) and isinstance(second, MutableSequence):
+        common = min(len(first), len(second))
+        return range(common), list(range(common, len(second))), list(reversed(range(common, len(first))))
+    return None
+
+
+def _diff_sets(first, second, path):
+    """:return: dictdiffer's add and remove differences of two sets"""
+    result = []
+    if second - first:
+        result.append(('add', path, [(0, second - first)]))
+    if first - second:
+        result.append(('remove', path, [(0, first - second)]))
+    return result
+
+
+def _diff_items(action, path, source, keys, expand, dot_notation):
+    """:return: dictdiffer's add or remove differences of the items of source at keys"""
+    if not keys:
+        return []
+    path = dotted_path(path, dot_notation)
+    items = [(key, copy_tree(source[key])) for key in keys]
+    if expand:
+        return [(action, path, [item]) for item in items]
+    return [(action, path, items)]
+
+
+def diff_trees(first, second, node=None, expand=False, tolerance=EPSILON, dot_notation=True, strict=False):
+    """
+    Difference two parsed trees, giving exactly what list(dictdiffer.diff()) gives for the same
+    arguments (so the result can be patched), but without walking subtrees that compare equal
+    :param dict first: original
+    :param dict second: changed
+    :param list node: path of first and second within their trees
+    :param bool expand: report each added or removed item separately
+    :param float tolerance: relative tolerance when comparing numbers
+    :param bool dot_notation: report paths as dotted strings where possible
+    :param bool strict: also report a change of type between values that compare equal (1 and True,
+                        2 and 2.0), which dictdiffer does not, so patching gives the second tree exactly
+    :return: list of ('add' | 'remove' | 'change', path, changes)
+    """
+    result = []
+
+    def dotted(path):
+        return dotted_path(path, dot_notation)
+
+    def walk(_first, _second, path):
+        keys = _diff_keys(_first, _second)
+        if keys is None:
+            if isinstance(_first, MutableSet) and isinstance(_second, MutableSet):
+                result.extend(_diff_sets(_first, _second, dotted(path)))
+            elif are_different(_first, _second, tolerance) or strict and type(_first) is not type(_second):
+                result.append(('change', dotted(path), (copy_tree(_first), copy_tree(_second))))
+            return
+        intersection, addition, deletion = keys
+        for key in intersection:
+            value, other = _first[key], _second[key]
+            if value is not other and (value != other or strict and not same_types(value, other)):
+                walk(value, other, path + [key])    # equal values never differ
+        result.extend(_diff_items('add', path, _second, addition, expand, dot_notation))
+        result.extend(_diff_items('remove', path, _first, deletion, expand, dot_notation))
+
+    walk(first, second, list(node or []))
+    return result
+
+
+def same_types(first, second):
+    """:return: whether two trees that compare equal also hold values of the same types throughout"""
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, dict):
+        return all(same_types(value, second[key]) for key, value in first.items())
+    if isinstance(first, (list, tuple)):
+        return all(same_types(value, other) for value, other in zip(first, second))
+    return True
+
+
+def prune_equal(first, second, strict=False):
+    """
+    Drop the entries two dicts have in common, recursing into dicts that differ
+    Equal subtrees are found by (C level) comparison, which is far cheaper than walking them,
+    and diff() of the pruned copies is the same as diff() of first and second (without a path_limit)
+    :param dict first: original
+    :param dict second: changed
+    :param bool strict: keep equal entries whose types differ, see diff_trees
+    :return: pruned copies of first and second
+    """
+    pruned_first, changed = {}, {}
+    for key, value in first.items():
+        if key in second:
+            other = second[key]
+            if value == other and (not strict or same_types(value, other)):
+                continue
+            if isinstance(value, dict) and isinstance(other, dict):
+                value, other = prune_equal(value, other, strict)
+            changed[key] = other
+        pruned_first[key] = value
+    pruned_second = {}
+    for key, value in second.items():
+        if key in changed:
+            pruned_second[key] = changed[key]
+        elif key not in first:
+            pruned_second[key] = value
+    return pruned_first, pruned_second
+
+
+# arguments handled by diff_trees, others (ignore, path_limit...) are left to dictdiffer
+DIFF_TREES_KWARGS = {'node', 'expand', 'tolerance', 'dot_notation', 'strict'}
+
+
+def diff_parsed(first, second, **kwargs):
+    """
+    :param dict first: original tree
+    :param dict second: changed tree
+    :param kwargs: as dictdiffer.diff
+    :return: list of differences, from diff_trees where it supports the arguments
+    """
+    if set(kwargs) <= DIFF_TREES_KWARGS:
+        return diff_trees(first, second, **kwargs)
+    if kwargs.get('strict'):
+        raise ValueError('strict differences are not supported with {}'.format(
+            ', '.join(sorted(set(kwargs) - DIFF_TREES_KWARGS))))
+    kwargs.pop('strict', None)
+    return list(diff(first, second, **kwargs))
+
+
 class Delta(object):
 
     def __init__(self, original, changed, cleanfunc=None):
@@ -626,6 +2798,7 @@ class Delta(object):
         self._diff = None
         self._diff_kwargs = dict()
         self._cleaner = cleanfunc or clean_counts
+        self._same_source = None
 
     def _parse(self, index):
         if not self.parsed[index]:
@@ -633,28 +2806,300 @@ class Delta(object):
             self.parsed[index] = True
         return self.bacon[index].parse(normalise=True)
 
+    def same_source(self):
+        """
+        Check without parsing whether both sides have byte identical input
+        :return: True if known to be identical, False if different or not known
+        """
+        if any(bacon.parsed for bacon in self.bacon):     # may have been patched
+            return False
+        if self._same_source is None:
+            self._same_source = False
+            args = [bacon._parser_args for bacon in self.bacon]
+            if args[0]['encoding'] != args[1]['encoding']:
+                pass
+            elif args[0]['string'] and args[1]['string']:
+                self._same_source = args[0]['string'] == args[1]['string']
+            elif not args[0]['string'] and not args[1]['string'] and \
+                    all(arg['source'] is not None and not hasattr(arg['source'], 'read') for arg in args):
+                try:
+                    self._same_source = same_content(args[0]['source'], args[1]['source'])
+                except (OSError, IOError):
+                    pass
+        return self._same_source
+
     def are_different(self):
+        if self.same_source():
+            return False
         tolerance = self._diff_kwargs.get('tolerance', EPSILON)
         return are_different(self._parse(0), self._parse(1), tolerance)
 
+    def adiff(self, clean=True, runner=None, **kwargs):
+        """
+        diff() in an executor, for asyncio (python 3), see pylib.abacon
+        :return: coroutine returning the list of differences
+        """
+        from pylib.abacon import adiff
+        return adiff(self, clean, runner, **kwargs)
+
     def diff(self, clean=True, **kwargs):
         """
         difference two BACON files
         :param bool clean: whether to clean
         :param kwargs: as follows
         : node=None ignore=None path_limit=None
-        : expand=False tolerance=EPSILON dot_notation=True
+        : expand=False tolerance=EPSILON dot_notation=True strict=False (see diff_trees)
         :see: dictdiff.diff for details
-        :return:
+        :return: list of differences
+
+        Byte identical sources are not parsed at all, and identical sections, devices
+        and other subtrees are dropped before cleaning and dictdiffer, unless a path_limit is given
         """
+        if self.same_source():
+            return []
         if self._diff is None or self._diff_kwargs != kwargs:
             parse = [self._parse(0), self._parse(1)]
+            if kwargs.get('path_limit') is None and isinstance(parse[0], dict) and isinstance(parse[1], dict):
+                strict = kwargs.get('strict', False)
+                parse = [{}, {}] if parse[0] == parse[1] and (not strict or same_types(parse[0], parse[1])) else \
+                    list(prune_equal(parse[0], parse[1], strict))
             if clean:
                 parse[0] = cleaner(parse[0], self._cleaner, key_only=True)
                 parse[1] = cleaner(parse[1], self._cleaner, key_only=True)
-            self._diff = diff(parse[0], parse[1], **kwargs)
+            self._diff = diff_parsed(parse[0], parse[1], **kwargs)
             self._diff_kwargs = dict(kwargs)
-        if self._diff:
-            return [item for item in self._diff]
-        return None
+        return list(self._diff)
+
+
+SeriesDiff = namedtuple('SeriesDiff', ('original', 'changed', 'diff'))
 
+
+def _load_snapshot(path, encoding=None, engine=None, cleanfunc=None, clean=True):
+    """DeltaSeries worker, parse, normalise and clean one snapshot"""
+    parsed = Bacon(source=path, encoding=encoding, engine=engine).parse(normalise=True)
+    return cleaner(parsed, cleanfunc or clean_counts, key_only=True) if clean else parsed
+
+
+class DeltaSeries(object):
+    """
+    Differences between consecutive BACON snapshots (t0->t1, t1->t2, ...)
+    Each snapshot is parsed, normalised and cleaned exactly once (not at all if byte identical
+    to its predecessor), the next ones parsing in worker processes while the current pair is diffed
+    """
+
+    def __init__(self, paths, cleanfunc=None, clean=True, workers=1, encoding=None, engine=None):
+        """
+        :param iterable paths: snapshot files, oldest first
+        :param callable cleanfunc: as Delta, must be picklable when using workers
+        :param bool clean: whether to clean
+        :param int workers: number of worker processes parsing ahead, 0 to parse in this process
+        :param str encoding: file encoding
+        :param str engine: parser engine
+        """
+        self.paths = list(paths)
+        self.workers = workers
+        self._load_kwargs = dict(encoding=encoding, engine=engine, cleanfunc=cleanfunc, clean=clean)
+
+    def _same(self, index):
+        try:
+            return index > 0 and same_content(self.paths[index - 1], self.paths[index])
+        except (OSError, IOError):
+            return False
+
+    def snapshots(self):
+        """
+        :return: generator of the parsed and cleaned tree of each snapshot in turn
+        """
+        previous = None
+        if not self.workers:
+            for index, path in enumerate(self.paths):
+                if not self._same(index):
+                    previous = _load_snapshot(path, **self._load_kwargs)
+                yield previous
+            return
+        if futures is None:
+            raise RuntimeError('DeltaSeries workers require concurrent.futures (the futures package on python 2)')
+        executor = futures.ProcessPoolExecutor(max_workers=self.workers)
+        ahead, scheduled = deque(), 0
+        try:
+            for _ in self.paths:
+                while scheduled < len(self.paths) and len(ahead) <= self.workers:
+                    ahead.append(None if self._same(scheduled) else
+                                 executor.submit(_load_snapshot, self.paths[scheduled], **self._load_kwargs))
+                    scheduled += 1
+                future = ahead.popleft()
+                if future is not None:
+                    previous = future.result()
+                yield previous
+        finally:
+            for future in ahead:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=True)
+
+    def diffs(self, **kwargs):
+        """
+        :param kwargs: as Delta.diff
+        :return: generator of SeriesDiff(original, changed, diff) for each consecutive pair
+        """
+        previous = None
+        for index, tree in enumerate(self.snapshots()):
+            if index:
+                result = [] if tree is previous else diff_parsed(previous, tree, **kwargs)
+                yield SeriesDiff(self.paths[index - 1], self.paths[index], result)
+            previous = tree
+
+    def __iter__(self):
+        return self.diffs()
+
+
+DeltaResult = namedtuple('DeltaResult', ('original', 'changed', 'diff', 'error'))
+
+
+def _delta_pair(original, changed, clean, cleanfunc, encoding, engine, kwargs):
+    """delta_many worker, diff a whole pair of files"""
+    try:
+        bacons = [Bacon(source=path, encoding=encoding, engine=engine) for path in (original, changed)]
+        return Delta(bacons[0], bacons[1], cleanfunc).diff(clean=clean, **kwargs), None
+    except Exception as exc:
+        return None, exc
+
+
+def _delta_sections(original, changed, names, clean, cleanfunc, encoding, engine, kwargs):
+    """
+    delta_many worker, diff some top level sections of a pair of files
+    :return: list of (name, in original, in changed, diff if in both else the value present)
+    """
+    trees = [Bacon(source=path, encoding=encoding, engine=engine, lazy=True).parse(normalise=True)
+             for path in (original, changed)]
+    node = list(kwargs.pop('node', None) or [])
+    results = []
+    for name in names:
+        values = []
+        for tree in trees:
+            section = {name: tree[name]} if name in tree else {}
+            if clean:   # as cleaning the whole tree would
+                section = cleaner(section, cleanfunc or clean_counts, key_only=True)
+            values.append(section.get(name, SKIPPED))
+        first, second = values
+        if first is not SKIPPED and second is not SKIPPED:
+            results.append((name, True, True, diff_parsed(first, second, node=node + [name], **kwargs)))
+        elif first is not SKIPPED or second is not SKIPPED:
+            results.append((name, first is not SKIPPED, second is not SKIPPED,
+                            first if first is not SKIPPED else second))
+    return results
+
+
+def _merge_sections(names, results, kwargs):
+    """
+    Combine _delta_sections results into what diff() of the whole trees gives
+    :param tuple names: section names of the original and the changed file, in order
+    :param list results: _delta_sections results
+    :param dict kwargs: diff arguments
+    :return: list of differences
+    """
+    diffs, added, removed = {}, [], []
+    for name, in_first, in_second, payload in results:
+        if in_first and in_second:
+            diffs[name] = payload
+        elif in_second:
+            added.append((name, payload))
+        else:
+            removed.append((name, payload))
+    merged = []
+    for name in names[0]:
+        merged.extend(diffs.get(name, []))
+    node = dotted_path(list(kwargs.get('node') or []), kwargs.get('dot_notation', True))
+    # added in the order of the changed file, removed in the order of the original
+    for action, items, order in (('add', added, names[1]), ('remove', removed, names[0])):
+        order = dict((name, index) for index, name in enumerate(order))
+        items.sort(key=lambda item: order[item[0]])
+        if items and kwargs.get('expand'):
+            merged.extend((action, node, [item]) for item in items)
+        elif items:
+            merged.append((action, node, items))
+    return merged
+
+
+def _split_sections(original, changed, split_size, encoding, kwargs):
+    """
+    :return: (original names, changed names) of the sections of a pair large enough to be diffed
+             by section, else None
+    """
+    if split_size is None or kwargs.get('path_limit') is not None or kwargs.get('ignore'):
+        return None     # dictdiffer applies these to the whole tree
+    try:
+        if max(os.stat(original).st_size, os.stat(changed).st_size) < split_size or \
+                same_content(original, changed):
+            return None
+        return tuple(list(Parser(source=path, encoding=encoding, mapped=True).index_sections())
+                     for path in (original, changed))
+    except (OSError, IOError, ValueError):
+        return None     # left to Delta to report
+
+
+def _submit_sections(executor, workers, original, changed, names, clean, cleanfunc, encoding, engine, kwargs):
+    """:return: futures diffing the sections of a pair, split evenly over the workers"""
+    seen = set(names[0])
+    union = names[0] + [name for name in names[1] if name not in seen]
+    size = max(1, -(-len(union) // workers))
+    return [executor.submit(_delta_sections, original, changed, union[start:start + size],
+                            clean, cleanfunc, encoding, engine, dict(kwargs))
+            for start in range(0, len(union), size)]
+
+
+def _pair_result(names, submitted, kwargs):
+    """:return: (diff, error) of a pair once its futures are done"""
+    try:
+        if names is None:
+            return submitted[0].result()
+        results = []
+        for future in submitted:
+            results.extend(future.result())
+        return _merge_sections(names, results, kwargs), None
+    except Exception as exc:
+        return None, exc
+
+
+def delta_many(pairs, workers=None, split_size=None, clean=True, cleanfunc=None, encoding=None, engine=None,
+               **kwargs):
+    """
+    Diff many (original, changed) pairs of BACON files in worker processes
+    :param iterable pairs: (original, changed) file paths
+    :param int workers: number of worker processes (default cpu count)
+    :param int split_size: pairs with a file of at least this many bytes are diffed by top level
+                           section over several workers (None never splits, nor do path_limit or ignore)
+    :param bool clean: whether to clean, as Delta.diff
+    :param callable cleanfunc: as Delta, must be picklable
+    :param str encoding: file encoding
+    :param str engine: parser engine
+    :param kwargs: as Delta.diff
+    :return: generator of DeltaResult(original, changed, diff, error) in the order of pairs, where
+             diff is the list Delta.diff returns and error any exception raised instead
+    """
+    if futures is None:
+        raise RuntimeError('delta_many requires concurrent.futures (the futures package on python 2)')
+    if not workers:
+        workers = getattr(os, 'cpu_count', lambda: None)() or 1
+    executor = futures.ProcessPoolExecutor(max_workers=workers)
+    jobs = deque()
+    try:
+        for original, changed in pairs:
+            names = _split_sections(original, changed, split_size, encoding, kwargs)
+            if names is None:
+                submitted = [executor.submit(_delta_pair, original, changed, clean, cleanfunc, encoding, engine,
+                                             kwargs)]
+            else:
+                submitted = _submit_sections(executor, workers, original, changed, names,
+                                             clean, cleanfunc, encoding, engine, kwargs)
+            jobs.append((original, changed, names, submitted))
+
+        while jobs:
+            original, changed, names, submitted = jobs.popleft()
+            result, error = _pair_result(names, submitted, kwargs)
+            yield DeltaResult(original, changed, result, error)
+    finally:
+        for _, _, _, submitted in jobs:
+            for future in submitted:
+                future.cancel()
+        executor.shutdown(wait=True)
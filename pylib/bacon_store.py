@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot store for BACON state history
+Keeps a full (normalised) base snapshot every keyframe_interval snapshots and
+the Delta from the previous snapshot for the others, in a SQLite database.
+Any snapshot is rebuilt from its base by Bacon.patch() of at most
+keyframe_interval - 1 delta records.
+"""
+from __future__ import unicode_literals
+
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+
+from six import string_types
+
+from pylib.bacon import Bacon, Delta, LazySections, copy_tree
+
+__all__ = (
+    'SnapshotStore',
+)
+
+
+# store format, bumped on incompatible changes
+STORE_VERSION = 2
+# snapshots per base snapshot
+KEYFRAME_INTERVAL = 32
+# record kinds
+KIND_BASE = 'base'
+KIND_DELTA = 'delta'
+# pickle protocol readable by python 2 and 3 (JSON would turn numeric keys into strings)
+PICKLE_PROTOCOL = 2
+# exact differences (no numeric tolerance, changes of type reported) with list paths, so keys containing
+# dots patch back correctly
+STORE_DIFF_KWARGS = dict(clean=False, tolerance=0, dot_notation=False, strict=True)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS snapshots ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' timestamp REAL NOT NULL,'
+    ' kind TEXT NOT NULL,'
+    ' base INTEGER NOT NULL,'
+    ' data BLOB NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS snapshots_base ON snapshots (base, id)',
+    'CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (timestamp, id)',
+)
+
+
+def parsed_bacon(tree):
+    """:return: Bacon holding an already parsed and normalised tree (an empty one parses the empty string)"""
+    bacon = Bacon(string='')
+    bacon.parsed, bacon.normalised = tree, True
+    return bacon
+
+
+def encode_record(value):
+    """:return: compressed pickle of a tree or delta"""
+    return sqlite3.Binary(zlib.compress(pickle.dumps(value, PICKLE_PROTOCOL)))
+
+
+def decode_record(data):
+    """:return: tree or delta decoded from encode_record() output"""
+    return pickle.loads(zlib.decompress(bytes(data)))
+
+
+class SnapshotStore(object):
+
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL, encoding=None, engine=None):
+        """
+        :param str path: SQLite database file, created if missing (':memory:' for a transient store)
+        :param int keyframe_interval: store a full snapshot every this many snapshots
+        :param str encoding: encoding of added BACON files
+        :param str engine: parser engine for added BACON files
+        """
+        if keyframe_interval < 1:
+            raise ValueError('keyframe_interval must be at least 1')
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.encoding = encoding
+        self.engine = engine
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None:
+                self.connection.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(STORE_VERSION),))
+            elif int(row[0]) != STORE_VERSION:
+                raise ValueError('{}: unsupported snapshot store version {}'.format(path, row[0]))
+        # (id, tree) of the latest snapshot, the original side of the next delta
+        self._last = None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+
+    def _tree(self, snapshot):
+        """:return: normalised tree of a BACON file path, Bacon or parsed tree"""
+        if isinstance(snapshot, dict):
+            return copy_tree(snapshot)
+        if not isinstance(snapshot, Bacon):
+            snapshot = Bacon(source=snapshot, encoding=self.encoding, engine=self.engine)
+        parsed = snapshot.parse(normalise=True)
+        return copy_tree(dict(parsed) if isinstance(parsed, LazySections) else parsed)
+
+    def _latest(self):
+        """:return: (id, timestamp, base, count of snapshots from that base) of the latest snapshot, or None"""
+        row = self.connection.execute('SELECT id, timestamp, base FROM snapshots ORDER BY id DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+        count = self.connection.execute('SELECT COUNT(*) FROM snapshots WHERE base = ?', (row[2],)).fetchone()[0]
+        return row + (count,)
+
+    def add(self, snapshot, timestamp=None):
+        """
+        Add the next snapshot, as a base snapshot or a delta from the previous one
+        :param Any snapshot: BACON file path, Bacon or parsed (normalised) tree
+        :param float timestamp: time of the snapshot, default the file's mtime or now
+        :return: id of the snapshot
+        """
+        if timestamp is None:
+            timestamp = os.stat(snapshot).st_mtime if isinstance(snapshot, string_types) else time.time()
+        tree = self._tree(snapshot)
+        latest = self._latest()
+        if latest is not None and timestamp < latest[1]:
+            raise ValueError('snapshot timestamp {} is before the latest {}'.format(timestamp, latest[1]))
+        with self.connection:
+            if latest is None or latest[3] >= self.keyframe_interval:
+                cursor = self.connection.execute(
+                    'INSERT INTO snapshots (timestamp, kind, base, data) VALUES (?, ?, 0, ?)',
+                    (timestamp, KIND_BASE, encode_record(tree)))
+                ident = cursor.lastrowid
+                self.connection.execute('UPDATE snapshots SET base = ? WHERE id = ?', (ident, ident))
+            else:
+                if self._last is None or self._last[0] != latest[0]:
+                    self._last = (latest[0], self.get(latest[0]))
+                delta = Delta(parsed_bacon(self._last[1]), parsed_bacon(tree)).diff(**STORE_DIFF_KWARGS)
+                cursor = self.connection.execute(
+                    'INSERT INTO snapshots (timestamp, kind, base, data) VALUES (?, ?, ?, ?)',
+                    (timestamp, KIND_DELTA, latest[2], encode_record(delta)))
+                ident = cursor.lastrowid
+        self._last = (ident, tree)
+        return ident
+
+    def get(self, ident):
+        """
+        Rebuild a snapshot from its base snapshot and deltas
+        :param int ident: snapshot id
+        :return: normalised tree of the snapshot
+        """
+        row = self.connection.execute('SELECT base FROM snapshots WHERE id = ?', (ident,)).fetchone()
+        if row is None:
+            raise KeyError(ident)
+        if self._last is not None and self._last[0] == ident:
+            return copy_tree(self._last[1])
+        bacon = None
+        for kind, data in self.connection.execute(
+                'SELECT kind, data FROM snapshots WHERE base = ? AND id <= ? ORDER BY id', (row[0], ident)):
+            if kind == KIND_BASE:
+                bacon = parsed_bacon(decode_record(data))
+            else:
+                bacon.patch(decode_record(data))
+        return bacon.parsed
+
+    def at(self, timestamp):
+        """
+        :param float timestamp: point in time
+        :return: normalised tree of the latest snapshot at or before timestamp, or None
+        """
+        row = self.connection.execute('SELECT id FROM snapshots WHERE timestamp <= ? ORDER BY timestamp DESC, id DESC '
+                                      'LIMIT 1', (timestamp,)).fetchone()
+        return None if row is None else self.get(row[0])
+
+    def history(self):
+        """:return: list of (id, timestamp, is base snapshot) of all snapshots, oldest first"""
+        return [(ident, timestamp, kind == KIND_BASE) for ident, timestamp, kind in
+                self.connection.execute('SELECT id, timestamp, kind FROM snapshots ORDER BY id')]
+
+    def stats(self):
+        """:return: dict of snapshot counts and stored (compressed) bytes by kind"""
+        stats = dict(bases=0, deltas=0, base_bytes=0, delta_bytes=0)
+        for kind, count, size in self.connection.execute(
+                'SELECT kind, COUNT(*), SUM(LENGTH(data)) FROM snapshots GROUP BY kind'):
+            name = 'bases' if kind == KIND_BASE else 'deltas'
+            stats[name] = count
+            stats[name[:-1] + '_bytes'] = size
+        return stats
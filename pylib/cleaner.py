@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+try:
+    from collections.abc import Mapping
+except ImportError:     # python 2
+    from collections import Mapping
 
 
 def cleaner(element, accept, level=0, key_only=False):
@@ -10,8 +14,8 @@ def cleaner(element, accept, level=0, key_only=False):
     :return: cleaned element
     """
 
-    if isinstance(element, dict):
-        # handle a dictionary
+    if isinstance(element, Mapping):
+        # handle a dictionary (or any other mapping)
         result = dict()
         for k, v in element.items():
             if accept(k) and (key_only or accept(v)):
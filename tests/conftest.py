@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # async syntax, a SyntaxError before collection could skip it
+    collect_ignore.append('test_abacon.py')
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# asyncio API tests, python 3 only (see conftest.py)
+import asyncio
+import threading
+from concurrent import futures
+
+import pytest
+
+from pylib.bacon import Bacon, Delta, copy_tree
+from pylib.abacon import AsyncRunner, aload
+from tests.test_bacon import LAZY_FIXTURE
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def test_abacon(tmpdir):
+    original, changed = tmpdir.join('original.bacon'), tmpdir.join('changed.bacon')
+    original.write(LAZY_FIXTURE)
+    changed.write(LAZY_FIXTURE.replace('last', 'tsal'))
+    expected = Delta(str(original), str(changed)).diff()
+    with futures.ThreadPoolExecutor(1) as threads, futures.ProcessPoolExecutor(1) as processes:
+        for runner in (None, AsyncRunner(threads, limit=1), AsyncRunner(processes)):
+            bacon = run(aload(str(original), runner=runner))
+            assert bacon.normalised and bacon.parsed == Bacon(LAZY_FIXTURE).parse(normalise=True)
+            bacon = Bacon(source=str(changed))
+            assert run(bacon.aparse(runner=runner)) == Bacon(LAZY_FIXTURE.replace('last', 'tsal')).parse()
+            delta = Delta(str(original), str(changed))
+            assert run(delta.adiff(runner=runner)) == expected
+            assert delta.diff() == expected
+        with pytest.raises(ValueError):
+            run(Bacon(source=str(original), lazy=True).aparse(runner=AsyncRunner(processes)))
+
+
+def test_abacon_cancel(tmpdir):
+    path = tmpdir.join('state.bacon')
+    path.write(LAZY_FIXTURE)
+    release = threading.Event()
+
+    async def cancel_queued(runner):
+        blocker = asyncio.ensure_future(runner.run(release.wait))
+        bacon = Bacon(source=str(path))
+        task = asyncio.ensure_future(bacon.aparse(normalise=True, runner=runner))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+        await blocker
+        # waiting on the limit and queued work are both dropped, the Bacon is as it was
+        assert bacon.parsed is None and not bacon.normalised
+        return await bacon.aparse(normalise=True, runner=runner)
+
+    with futures.ThreadPoolExecutor(1) as threads:
+        for limit in (1, None):
+            release.clear()
+            assert run(cancel_queued(AsyncRunner(threads, limit))) == Bacon(LAZY_FIXTURE).parse(normalise=True)
+
+
+def test_abacon_cancel_parsed():
+    release = threading.Event()
+
+    class BlockingBacon(Bacon):
+        """blocks the worker once it has normalised its copy of the tree"""
+        def normalise_devices(self):
+            parsed = super(BlockingBacon, self).normalise_devices()
+            release.wait()
+            return parsed
+
+    async def cancel_running(runner, bacon):
+        task = asyncio.ensure_future(bacon.aparse(normalise=True, runner=runner))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+
+    expected = Bacon(LAZY_FIXTURE).parse(normalise=True)
+    with futures.ThreadPoolExecutor(1) as threads:
+        for lazy in (False, True):
+            release.clear()
+            bacon = BlockingBacon(LAZY_FIXTURE, lazy=lazy, single_pass=False)
+            parsed = bacon.parse()
+            unnormalised = copy_tree(dict(parsed))
+            run(cancel_running(AsyncRunner(threads), bacon))
+            # the parsed tree is as it was, and still normalises
+            assert not bacon.normalised and bacon.parsed is parsed and dict(parsed) == unnormalised
+            assert dict(bacon.parse(normalise=True)) == expected
@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
+import io
+import json
 import os
+import pickle
 
 import pytest
+import jsonpath_rw_ext as jsonpath
 
 from six import string_types
-from pylib.bacon import Parser, combine, Bacon
+from dictdiffer import diff
+from pylib.cleaner import cleaner
+from pylib.bacon import ParseError, Parser, ScannerParser, IterativeParser, LazySections, Event, build_events, \
+    combine, Bacon, MatchType, NumberArray, PARSE_CACHE, dumps, PathIndex, SimplePath, Delta, DeltaSeries, \
+    clean_counts, delta_many, diff_trees, parse_many
 
 
 def test_parser_match_string():
@@ -69,6 +77,7 @@ def test_parser_match_to_newline():
         with pytest.raises(ValueError):
              parser.nextch()
 
+
 FIXTURE = """
 # This is an example configuration for syntax testing only
 
@@ -119,6 +128,21 @@ FIXTURE = """
 }
 """
 
+LAZY_FIXTURE = FIXTURE + """
+*SECTION2
+{ <
+    {  "DEVICES",
+    {
+        { < {  "DEVICE",  "ONE"  } {  "VALUE",  1  } > }
+        { < {  "DEVICE",  "TWO"  } {  "VALUE",  "{two}"  } > }
+    }
+    }
+> }
+# comment mentioning *SECTION4
+*SECTION3  "last"
+"""
+
+
 def test_section_parser():
     parser = Parser(FIXTURE)
     parsed = parser.parse()
@@ -128,6 +152,7 @@ def test_section_parser():
     assert isinstance(section1, list)
     assert len(section1) == 2
 
+
 def test_bacon_parser():
     bacon = Bacon(FIXTURE)
     parsed = bacon.parse()
@@ -147,3 +172,426 @@ def test_bacon_json():
     jstring = bacon.json(indent=2, sort_keys=True)
     assert isinstance(jstring, string_types)
 
+
+def test_scanner_engine():
+    parser = Parser(FIXTURE, engine='scanner')
+    assert isinstance(parser, ScannerParser)
+    assert parser.parse() == Parser(FIXTURE).parse()
+    assert parser.index == len(FIXTURE)
+    for test_value in ('"a\\u0041b"', '"a\\q"', '"a\x01b"', '"a\\u00G1"', '"unterminated'):
+        results = []
+        for engine in ('char', 'scanner'):
+            parser = Parser(test_value, engine=engine)
+            try:
+                results.append((parser.match_string(), parser.index))
+            except ValueError as exc:
+                results.append((str(exc), parser.index))
+        assert results[0] == results[1]
+    with pytest.raises(ValueError):
+        Parser(FIXTURE, engine='unknown')
+
+
+def test_iterative_engine():
+    parser = Parser(FIXTURE, engine='iterative')
+    assert isinstance(parser, IterativeParser)
+    assert parser.parse() == Parser(FIXTURE).parse()
+    assert Parser(LAZY_FIXTURE, engine='iterative').parse(only=['SECTION2.DEVICES.TWO']) == \
+        Parser(LAZY_FIXTURE).parse(only=['SECTION2.DEVICES.TWO'])
+    depth = 10000
+    nested = '*DEEP ' + '<{ "a", ' * depth + '1' + ' }>' * depth
+    value = Parser(nested, engine='iterative').parse()['DEEP']
+    for _ in range(depth):
+        value = value['a']
+    assert value == 1
+
+
+def test_parser_iter_sections(tmpdir):
+    text = FIXTURE + '*SECTION2 { "ke*y", "vâlüé \\" {" }\n# comment with * and "\n*SECTION3 <1 2 3>\n'
+    expected = Parser(text).parse()
+    for chunk_size in (1, 3, 7, 1024):
+        source = io.BytesIO(text.encode('utf-8'))
+        sections = list(Parser().iter_sections(source, chunk_size=chunk_size))
+        assert [name for name, _ in sections] == ['SECTION1', 'SECTION2', 'SECTION3']
+        assert dict(sections) == expected
+    # named files are read untranslated, CRLF line ends are not part of section names
+    path = tmpdir.join('crlf.bacon')
+    path.write_binary(text.replace('\n', '\r\n').encode('utf-8'))
+    for chunk_size in (1, 1024):
+        assert dict(Parser().iter_sections(str(path), chunk_size=chunk_size)) == expected
+    out = io.StringIO()
+    Bacon(source=str(path)).transcode(out)
+    assert json.loads(out.getvalue()) == expected
+
+
+def test_parser_mapped(tmpdir):
+    text = FIXTURE + '*SECTION2 { "kéy", "vâlüé \\\\" "more" }\n'
+    path = tmpdir.join('state.bacon')
+    path.write_binary(text.encode('utf-8'))
+    parser = Parser(source=str(path), mapped=True)
+    assert isinstance(parser, ScannerParser)
+    assert parser.parse() == Parser(text).parse()
+    assert parser.index == parser.length == len(text.encode('utf-8'))
+    assert Bacon(source=str(path), mapped=True).parse()['SECTION2'] == {'kéy': 'vâlüé \\more'}
+    with pytest.raises(ValueError):
+        Parser(source=str(path), mapped=True, engine='char')
+    # error excerpts may cut a multi-byte character, and CRLF line ends are not part of section names
+    path.write_binary('*S1 "x"\r\n*S2 ééé\r\n'.encode('utf-8'))
+    with pytest.raises(ParseError):
+        Parser(source=str(path), mapped=True).parse()
+    path.write_binary(FIXTURE.replace('\n', '\r\n').encode('utf-8'))
+    assert Parser(source=str(path), mapped=True).parse() == Parser(source=str(path)).parse()
+
+
+def test_parse_cache(tmpdir):
+    path = tmpdir.join('state.bacon')
+    path.write(LAZY_FIXTURE)
+    PARSE_CACHE.configure(maxsize=4)
+    try:
+        expected = Bacon(LAZY_FIXTURE).parse(normalise=True)
+        assert Bacon(source=str(path)).parse(normalise=True) == expected
+        assert PARSE_CACHE.stats()['misses'] == 1
+        bacon = Bacon(source=str(path))
+        assert bacon.parse(normalise=True) == expected
+        assert bacon._parser is None
+        bacon.patch([('change', 'SECTION2.DEVICES.ONE.VALUE', (1, 2))])
+        assert Bacon(source=str(path)).parse(normalise=True) == expected
+        assert PARSE_CACHE.stats()['hits'] == 2
+        path.write(LAZY_FIXTURE + '*SECTION4 4\n')
+        os.utime(str(path), (0, 0))
+        assert Bacon(source=str(path)).parse(normalise=True)['SECTION4'] == 4
+        PARSE_CACHE.configure(maxsize=1)
+        assert PARSE_CACHE.stats()['evictions'] == 1
+    finally:
+        PARSE_CACHE.configure(maxsize=0)
+        PARSE_CACHE.clear()
+
+
+def test_bacon_sidecar(tmpdir):
+    path = tmpdir.join('state.bacon')
+    path.write(LAZY_FIXTURE)
+    expected = Bacon(LAZY_FIXTURE).parse(normalise=True)
+    assert Bacon(source=str(path), sidecar=True).parse(normalise=True) == expected
+    assert tmpdir.join('state.bacon.bcache').check()
+    bacon = Bacon(source=str(path), sidecar=True)
+    assert bacon.parse(normalise=True) == expected
+    assert bacon._parser is None
+    os.utime(str(path), (0, 0))     # touched but unchanged, validated by hash
+    assert Bacon(source=str(path), sidecar=True).parse(normalise=True) == expected
+    assert Bacon(source=str(path), sidecar=True)._load_cached(bacon._cache_key(True)) == expected
+    path.write(LAZY_FIXTURE.replace('"last"', '"tsal"'))
+    os.utime(str(path), (0, 0))
+    bacon = Bacon(source=str(path), sidecar=True)
+    assert bacon._load_cached(bacon._cache_key(True)) is None
+    assert bacon.parse(normalise=True)['SECTION3'] == 'tsal'
+
+
+def test_parse_many(tmpdir):
+    paths = []
+    for index in range(4):
+        path = tmpdir.join('state{}.bacon'.format(index))
+        path.write(LAZY_FIXTURE if index else '*BAD { "a", 1 ')
+        paths.append(str(path))
+    paths.append(str(tmpdir.join('missing.bacon')))
+    expected = Bacon(LAZY_FIXTURE).parse(normalise=True)
+    for workers in (0, 2):
+        results = dict((result.path, result) for result in parse_many(paths, workers=workers))
+        assert sorted(results) == sorted(paths)
+        assert all(results[path].parsed == expected and results[path].error is None for path in paths[1:4])
+        assert isinstance(results[paths[0]].error, ValueError)
+        assert 'state0.bacon' in str(results[paths[0]].error)
+        assert isinstance(results[paths[4]].error, (OSError, IOError))
+
+
+def test_bacon_lazy():
+    bacon = Bacon(LAZY_FIXTURE, lazy=True)
+    parsed = bacon.parse()
+    assert isinstance(parsed, LazySections)
+    assert list(parsed) == ['SECTION1', 'SECTION2', 'SECTION3']
+    assert not parsed.sections
+    assert bacon.find('$.SECTION3') == 'last'
+    assert list(parsed.sections) == ['SECTION3']
+    bacon.normalise_devices()
+    assert list(parsed.sections) == ['SECTION3']
+    assert bacon.find('$.SECTION2.DEVICES.TWO.VALUE') == '{two}'
+    assert dict(parsed) == Bacon(LAZY_FIXTURE).parse(normalise=True)
+    assert Bacon(LAZY_FIXTURE, lazy=True).matches('$..DEVICE', 'AAALDP') == (True, 'AAALDP')
+
+
+def test_bacon_find_many():
+    bacon = Bacon(LAZY_FIXTURE)
+    bacon.parse(normalise=True)
+    paths = ['$.SECTION3', 'SECTION2.DEVICES.TWO.VALUE', '$.MISSING', '$.SECTION3']
+    assert bacon.find_many(paths) == ['last', '{two}', None, 'last']
+    assert bacon.matches_many([
+        ('$.SECTION3', 'last'),
+        ('$.SECTION3', 'LAST', MatchType.IEQUAL),
+        {'path': '$.MISSING', 'matchtype': MatchType.ABSENT},
+        ('SECTION2.DEVICES.ONE.VALUE', '1', None, lambda found, match: found != match),
+    ]) == [(True, 'last'), (True, 'last'), (True, None), (False, '1')]
+
+
+def test_bacon_simple_paths():
+    parsed = {'A': {'B': [1, {'C': 'x', 'D': None}, 'str']}, 'where': 1}
+    for path in ('$', '$.A.B[1].C', 'A.B[1].D', '$.A.B[2][1]', '$.A.B[3]', '$.A.B.C', '$.A.B[0].C'):
+        assert SimplePath.compile(path) is not None
+        assert Bacon._find(path, parsed) == next((str(found.value) for found in jsonpath.parse(path).find(parsed)), None)
+    for path in ('', '$.where', '$..C', '$.A.B[*]', "$.A['B']", '$.A.B[-1]', 'A..B', '.A', '$.A[?(@.C)]'):
+        assert SimplePath.compile(path) is None
+
+
+def test_bacon_path_index():
+    bacon = Bacon(LAZY_FIXTURE, index=True)
+    bacon.parse(normalise=True)
+    plain = Bacon(LAZY_FIXTURE)
+    plain.parse(normalise=True)
+    for path in ('$.SECTION3', 'SECTION2.DEVICES.TWO.VALUE', '$.SECTION2.DEVICES.ONE', '$.MISSING'):
+        assert bacon.find(path) == plain.find(path)
+    assert bacon.find_prefix('$.SECTION2.DEVICES') == [
+        ('SECTION2.DEVICES.ONE.DEVICE', 'ONE'), ('SECTION2.DEVICES.ONE.VALUE', 1),
+        ('SECTION2.DEVICES.TWO.DEVICE', 'TWO'), ('SECTION2.DEVICES.TWO.VALUE', '{two}'),
+    ]
+    bacon.patch([('change', 'SECTION2.DEVICES.ONE.VALUE', (1, 2)),
+                 ('remove', 'SECTION2.DEVICES', [('TWO', {})]),
+                 ('add', '', [('SECTION4', {'a b': [1, 2]})])])
+    assert bacon.find('SECTION2.DEVICES.ONE.VALUE') == '2'
+    assert bacon.find('SECTION2.DEVICES.TWO.VALUE') is None
+    assert bacon.find_prefix('SECTION4') == [("SECTION4['a b'][0]", 1), ("SECTION4['a b'][1]", 2)]
+    assert bacon.path_index.leaves == PathIndex(bacon.parsed).leaves
+
+
+def test_bacon_single_pass_normalise():
+    nested = LAZY_FIXTURE + """
+*SECTION5 < { "OUTER", <
+    { "DEVICES", {
+        { < { "DEVICE", "A" } { "DEVICES", { { < { "DEVICE", "B" } > } { < { "DEVICE", "C" } > } } } > }
+        { < { "DEVICE", "D" } > }
+    } }
+> } { "OTHER", { { < { "DEVICES", { { < { "DEVICE", "E" } > } { < { "DEVICE", "F" } > } } } > } } } >
+"""
+    for engine in ('char', 'iterative'):
+        single = Bacon(nested, engine=engine).parse(normalise=True)
+        assert single == Bacon(nested, engine=engine, single_pass=False).parse(normalise=True)
+        assert sorted(single['SECTION5']['OUTER']['DEVICES']) == ['A', 'D']
+        assert isinstance(single['SECTION5']['OUTER']['DEVICES']['A']['DEVICES'], list)
+    with pytest.raises(TypeError):
+        Bacon('*S { "DEVICES", 1 }').parse(normalise=True)
+    assert Bacon('*S { "DEVICES", 1 } *S 2').parse(normalise=True) == {'S': 2}
+
+
+def test_bacon_only():
+    full = Bacon(LAZY_FIXTURE)
+    full.parse(normalise=True)
+    for path, section in (('$.SECTION2.DEVICES.TWO.VALUE', 'SECTION2'),
+                          ('SECTION3', 'SECTION3'),
+                          ("$['SECTION1'][0].DEVICE_STATE", 'SECTION1')):
+        for lazy in (False, True):
+            bacon = Bacon(LAZY_FIXTURE, lazy=lazy)
+            parsed = bacon.parse(normalise=True, only=[path])
+            assert bacon.find(path) == full.find(path)
+            assert list(parsed) == [section]
+    parsed = Bacon(LAZY_FIXTURE).parse(only=['SECTION1.DEVICE'])
+    assert parsed == {'SECTION1': [{'DEVICE': 'AAALDP'}, {'DEVICE': 'APOLLO'}]}
+
+
+def test_parser_events():
+    events = list(Parser('*A { "k", < 1 2 > }\n# comment\n*B "b"').events())
+    assert events == [
+        (Event.START_SECTION, 'A'), (Event.START_OBJECT, '{'), (Event.KEY, 'k'),
+        (Event.START_OBJECT, '<'), (Event.SCALAR, 1), (Event.SCALAR, 2), (Event.END_OBJECT, '>'),
+        (Event.END_OBJECT, '}'), (Event.END_SECTION, 'A'),
+        (Event.START_SECTION, 'B'), (Event.SCALAR, 'b'), (Event.END_SECTION, 'B'),
+    ]
+    for engine in ('char', 'scanner'):
+        assert build_events(Parser(LAZY_FIXTURE, engine=engine).events()) == Parser(LAZY_FIXTURE).parse()
+    # no recursion per nesting level
+    deep = '*DEEP ' + '{' * 5000 + '1' + '}' * 5000
+    assert len(list(Parser(deep).events())) == 10003
+
+
+def test_delta_diff():
+    changed = LAZY_FIXTURE.replace('"{two}"', '"{2}"').replace('*SECTION3', '*SECTION4 { "COMMAND_COUNTS", 1 }\n*SECTION3')
+    delta = Delta(Bacon(LAZY_FIXTURE), Bacon(changed))
+    trees = [cleaner(Bacon(text).parse(normalise=True), clean_counts, key_only=True) for text in (LAZY_FIXTURE, changed)]
+    assert delta.diff() == list(diff(*trees)) == [('change', 'SECTION2.DEVICES.TWO.VALUE', ('{two}', '{2}')),
+                                                  ('add', '', [('SECTION4', {})])]
+    assert delta.diff(path_limit=[('SECTION2',)]) == list(diff(*trees, path_limit=[('SECTION2',)]))
+    assert Delta(Bacon(LAZY_FIXTURE), Bacon(LAZY_FIXTURE)).diff() == []
+
+
+def test_delta_same_source(tmpdir):
+    paths = []
+    for name, text in (('a', LAZY_FIXTURE), ('b', LAZY_FIXTURE), ('c', LAZY_FIXTURE.replace('last', 'tsal'))):
+        path = tmpdir.join(name + '.bacon')
+        path.write(text)
+        paths.append(str(path))
+    delta = Delta(paths[0], paths[1])
+    assert delta.diff() == [] and not delta.are_different()
+    assert delta.bacon[0]._parser is None and delta.bacon[1]._parser is None
+    delta = Delta(paths[0], paths[2])
+    assert not delta.same_source()
+    assert delta.diff() == [('change', 'SECTION3', ('last', 'tsal'))]
+    assert Delta(Bacon(LAZY_FIXTURE), Bacon(LAZY_FIXTURE)).same_source()
+
+
+def test_diff_trees():
+    first = Bacon(LAZY_FIXTURE).parse(normalise=True)
+    second = Bacon(LAZY_FIXTURE.replace('"{two}"', '2.0').replace('*SECTION3', '*SECTION4 <1 2>\n*SECTION3')
+                   .replace('{  "VALUE",  1  }', '')).parse(normalise=True)
+    bacon = Bacon(LAZY_FIXTURE)
+    bacon.parse(normalise=True)
+    assert bacon.patch(diff_trees(first, second)) == second
+    second['SECTION'] = {'nan': float('nan'), 'number': 1.0000000001}
+    first['SECTION'] = {'nan': float('nan'), 'number': 1}
+    for kwargs in ({}, {'expand': True}, {'dot_notation': False}, {'tolerance': None}, {'node': ['ROOT']}):
+        assert diff_trees(first, second, **kwargs) == list(diff(first, second, **kwargs))
+    assert diff_trees({'A': [1, True]}, {'A': [True, 1]}) == []
+    assert diff_trees({'A': [1, True]}, {'A': [True, 1]}, strict=True, dot_notation=False) == \
+        [('change', ['A', 0], (1, True)), ('change', ['A', 1], (True, 1))]
+
+
+def test_delta_series(tmpdir):
+    texts = [LAZY_FIXTURE, LAZY_FIXTURE, LAZY_FIXTURE.replace('last', 'tsal'),
+             LAZY_FIXTURE.replace('"{two}"', '2').replace('*SECTION3', '*SECTION4 { "COMMAND_COUNTS", 1 }\n*SECTION3')]
+    paths = []
+    for index, text in enumerate(texts):
+        path = tmpdir.join('state{}.bacon'.format(index))
+        path.write(text)
+        paths.append(str(path))
+    expected = [Delta(paths[index - 1], paths[index]).diff() for index in range(1, len(paths))]
+    for workers in (0, 1):
+        results = list(DeltaSeries(paths, workers=workers))
+        assert [(result.original, result.changed) for result in results] == list(zip(paths, paths[1:]))
+        assert [result.diff for result in results] == expected
+
+
+def test_delta_many(tmpdir):
+    texts = {
+        'base': LAZY_FIXTURE,
+        'same': LAZY_FIXTURE,
+        'value': LAZY_FIXTURE.replace('"{two}"', '2').replace('last', 'tsal'),
+        'sections': LAZY_FIXTURE.replace('*SECTION1', '*SECTION0 { "COMMAND_COUNTS", 1 }\n*SECTION5 "new"\n*SECTION1')
+                                .replace('*SECTION3  "last"', ''),
+    }
+    paths = {}
+    for name, text in texts.items():
+        paths[name] = str(tmpdir.join(name + '.bacon'))
+        with io.open(paths[name], 'w') as handle:
+            handle.write(text)
+    pairs = [(paths['base'], paths[name]) for name in ('same', 'value', 'sections')] + \
+        [(paths['sections'], paths['value']), (paths['base'], str(tmpdir.join('missing.bacon')))]
+    for kwargs in ({}, {'expand': True}, {'node': ['root'], 'dot_notation': False},
+                   {'ignore': {'SECTION2', 'SECTION0', 'SECTION3'}}):
+        expected = [Delta(original, changed).diff(**kwargs) for original, changed in pairs[:-1]]
+        for split_size in (None, 0):
+            results = list(delta_many(pairs, workers=2, split_size=split_size, **kwargs))
+            assert [(result.original, result.changed) for result in results] == pairs
+            assert [result.diff for result in results[:-1]] == expected
+            assert all(result.error is None for result in results[:-1])
+            assert results[-1].diff is None and results[-1].error is not None
+    # pairs diffed whole are parsed as those diffed by section
+    for split_size in (None, 0):
+        result, = delta_many(pairs[1:2], workers=2, split_size=split_size, engine='unknown')
+        assert isinstance(result.error, ValueError) and 'unknown' in str(result.error)
+
+
+def test_bacon_compact(tmpdir):
+    text = LAZY_FIXTURE + """
+*SECTION4 < { "INTS", { 1 2 3 } } { "FLOATS", { 1.5 2.5 } } { "MIXED", { 1 2.5 } } { "BIG", { 1 99999999999999999999 } } >
+"""
+    expected = Bacon(text).parse(normalise=True)
+    bacon = Bacon(text, compact=True, index=True)
+    parsed = bacon.parse(normalise=True)
+    assert parsed == expected
+    numbers = parsed['SECTION4']
+    assert isinstance(numbers['INTS'], NumberArray) and isinstance(numbers['FLOATS'], NumberArray)
+    assert numbers['INTS'] == [1, 2, 3] and numbers['INTS'][1:] == [2, 3] and str(numbers['FLOATS']) == '[1.5, 2.5]'
+    assert isinstance(numbers['MIXED'], list) and isinstance(numbers['BIG'], list)
+    with pytest.raises(TypeError):
+        numbers['INTS'][0] = 4
+    assert bacon.find('$.SECTION4.INTS[2]') == '3'
+    assert bacon.find('$.SECTION4.FLOATS') == '[1.5, 2.5]'
+    assert bacon.json(sort_keys=True) == json.dumps(expected, sort_keys=True)
+    # keys and short values are shared across trees
+    other = Bacon(text, compact=True).parse(normalise=True)
+    assert list(other['SECTION2']['DEVICES'])[0] is list(parsed['SECTION2']['DEVICES'])[0]
+    assert other['SECTION3'] is parsed['SECTION3']
+    # lazy sections are compacted as they are parsed
+    path = tmpdir.join('state.bacon')
+    path.write(text)
+    lazy = Bacon(source=str(path), lazy=True, compact=True).parse(normalise=True)
+    assert isinstance(lazy['SECTION4']['INTS'], NumberArray)
+    assert dict(lazy) == expected
+
+
+def test_bacon_transcode(tmpdir):
+    text = LAZY_FIXTURE + """
+*SECTION4 < { "LISTS", { { 1 2 } { 3 } } } { "MERGED", { < { "A", 1 } > < { "B", "\\u00e9" } > } } { "DROPPED", 1 } 2 >
+"""
+    expected = Parser(text).parse()
+    for engine in ('char', 'scanner'):
+        out = io.StringIO()
+        assert Parser(text, engine=engine).transcode(out) == 4
+        assert out.getvalue() == json.dumps(expected)
+    path = tmpdir.join('state.bacon')
+    path.write(text)
+    out = io.StringIO()
+    assert Bacon(source=str(path)).transcode(out, ndjson=True, chunk_size=16, ensure_ascii=False) == 4
+    lines = out.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [{name: value} for name, value in expected.items()]
+    assert '\u00e9' in lines[-1]
+    # transcoding does not consume the input of a later parse
+    bacon = Bacon(text)
+    out = io.StringIO()
+    bacon.transcode(out, separators=(',', ':'))
+    assert out.getvalue() == json.dumps(expected, separators=(',', ':'))
+    assert bacon.parse() == expected
+    with pytest.raises(ValueError):
+        bacon.transcode(io.StringIO(), indent=2)
+
+
+def test_bacon_dump(tmpdir):
+    for text in (FIXTURE, LAZY_FIXTURE):
+        parsed = Parser(text).parse()
+        assert Parser(dumps(parsed)).parse() == parsed
+    # a patched, normalised tree is written with its devices as lists again
+    changed = LAZY_FIXTURE.replace('"{two}"', '"{2}"').replace('*SECTION3', '*SECTION4 { "COMMAND_COUNTS", 1 }\n*SECTION3')
+    changed = changed.replace('{ < {  "DEVICE",  "TWO"', '{ < {  "DEVICE",  "THREE"  } {  "VALUE", "a\\"\\n" } > }\n{ < {  "DEVICE",  "TWO"')
+    bacon = Bacon(LAZY_FIXTURE)
+    bacon.parse(normalise=True)
+    bacon.patch(Delta(Bacon(LAZY_FIXTURE), Bacon(changed)).diff(clean=False))
+    path = tmpdir.join('patched.bacon')
+    with io.open(str(path), 'w', encoding='utf-8') as fp:
+        bacon.dump(fp, buffer_size=16)
+    assert path.read() == bacon.dumps()
+    assert Bacon(source=str(path)).parse(normalise=True) == Bacon(changed).parse(normalise=True)
+    assert Parser(dumps({'LIST': ['a', 'b', '', 'c', {'A': '\x01'}, 1.5, None, False]})).parse() == \
+        {'LIST': ['a', 'b', '', 'c', {'A': '\x01'}, 1.5, None, False]}
+    with pytest.raises(ValueError):
+        dumps({'SECTION': float('nan')})
+    with pytest.raises(ValueError):
+        dumps({'TWO WORDS': 1})
+    with pytest.raises(ValueError):
+        dumps({'SECTION\r': 1})
+
+
+def test_parse_error_location(tmpdir):
+    text = '*SECTION1 1\n# comment\n\n   x\n'
+    path = tmpdir.join('bad.bacon')
+    path.write(text)
+    expected = 'Expected start of section marker "*": bad.bacon(4:4) offset 26: "x"'
+    for kwargs in ({}, {'engine': 'scanner'}, {'mapped': True}, {'defer_errors': True}):
+        with pytest.raises(ParseError) as error:
+            Parser(source=str(path), **kwargs).parse()
+        assert str(error.value) == expected
+        assert error.value.msg == 'Expected start of section marker "*"'
+    parser = Parser(text)
+    assert parser.output_err('here', 0) == 'here: <text>(1:0) offset 0: "*"'
+    assert parser.output_err('here', 12) == 'here: <text>(2:1) offset 12: "#"'
+    assert parser.lines.line_col(len(text)) == (5, 1)
+    # deferred errors are formatted against the input they were raised for
+    parser = Parser('*S 1 x', defer_errors=True)
+    with pytest.raises(ValueError) as error:
+        parser.parse()
+    parser.setup('*T 2')
+    assert str(error.value).endswith('<text>(1:5) offset 5: "x"')
+    assert str(pickle.loads(pickle.dumps(error.value))) == str(error.value)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylib.bacon import Bacon
+from pylib.bacon_store import SnapshotStore
+
+STATE = """
+*SECTION1
+{ <
+    {  "DEVICES",
+    {
+{devices}
+    }
+    }
+> }
+*SECTION2  "{state}"
+"""
+DEVICE = '        { < {  "DEVICE",  "DEV{index}"  } {  "VALUE",  {value}  } {  "NAME", "a.b"  } > }'
+
+
+def state(values, text='up'):
+    devices = '\n'.join(DEVICE.replace('{index}', str(index)).replace('{value}', str(value))
+                        for index, value in enumerate(values))
+    return STATE.replace('{devices}', devices).replace('{state}', text)
+
+
+def test_snapshot_store(tmpdir):
+    texts = [state([1, 2, 3]), state([1, 2, 4]), state([1, 2, 4], 'down'), state([1, 2]),
+             state([1, 2, 5, 6]), state([1.5, 2, 5, 6]), state([8, 9]), state([7, 9])]
+    paths = []
+    for index, text in enumerate(texts):
+        path = tmpdir.join('state{}.bacon'.format(index))
+        path.write(text)
+        paths.append(str(path))
+    expected = [Bacon(text).parse(normalise=True) for text in texts]
+    database = str(tmpdir.join('history.db'))
+    with SnapshotStore(database, keyframe_interval=3) as store:
+        for index, path in enumerate(paths):
+            assert store.add(path, timestamp=100 + index) == index + 1
+        assert [store.get(index + 1) for index in range(len(paths))] == expected
+        with pytest.raises(ValueError):
+            store.add(paths[0], timestamp=99)
+    with SnapshotStore(database, keyframe_interval=3) as store:
+        assert len(store) == len(paths)
+        assert [is_base for _, _, is_base in store.history()] == [True, False, False] * 2 + [True, False]
+        assert [store.get(index + 1) for index in range(len(paths))] == expected
+        assert store.at(99) is None
+        assert store.at(103.5) == expected[3]
+        assert store.at(1000) == expected[-1]
+        with pytest.raises(KeyError):
+            store.get(len(paths) + 1)
+        # continues the delta chain from the stored history
+        store.add(Bacon(texts[0]), timestamp=200)
+        assert store.get(len(paths) + 1) == expected[0]
+        assert store.history()[-1][2] is False
+        stats = store.stats()
+        assert (stats['bases'], stats['deltas']) == (3, 6)
+
+
+def test_snapshot_store_numeric_devices():
+    texts = [state([1, 2]).replace('"DEV0"', '5').replace('"DEV1"', '6'),
+             state([1, 3]).replace('"DEV0"', '5').replace('"DEV1"', '6')]
+    expected = [Bacon(text).parse(normalise=True) for text in texts]
+    assert 5 in expected[0]['SECTION1']['DEVICES']
+    with SnapshotStore(':memory:') as store:
+        for index, text in enumerate(texts):
+            store.add(Bacon(text), timestamp=index)
+        store._last = None     # rebuild from the stored records, not the cached latest tree
+        assert [store.get(index + 1) for index in range(len(texts))] == expected
+
+
+def test_snapshot_store_types():
+    texts = ['*SECTION1 <{ "A", 1 } { "B", 0 } { "C", 2 } { "D", { 1 2 } }>',
+             '*SECTION1 <{ "A", true } { "B", false } { "C", 2.0 } { "D", { 1.0 2 } }>']
+    expected = [Bacon(text).parse(normalise=True) for text in texts]
+    with SnapshotStore(':memory:') as store:
+        for index, text in enumerate(texts):
+            store.add(Bacon(text), timestamp=index)
+        store._last = None     # rebuild from the stored records, not the cached latest tree
+        rebuilt = store.get(2)
+    # values compare equal across the change of type, so check the types too
+    assert rebuilt == expected[1] and repr(rebuilt) == repr(expected[1])